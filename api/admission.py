@@ -0,0 +1,84 @@
+"""
+Admission control for research requests.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted and should be retried later."""
+    
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Caps concurrent research runs and bounds the queue waiting for a slot."""
+    
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float, retry_after: int):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        # Waiters that do not count against max_queue
+        self.backlog = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+    
+    def check(self):
+        """Fail fast if the wait queue is already full."""
+        if self.active + self.waiting - self.backlog >= self.max_concurrent + self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("Research queue is full", self.retry_after)
+    
+    @asynccontextmanager
+    async def slot(self, bounded: bool = True) -> AsyncIterator[None]:
+        """Hold a research slot, waiting in the bounded queue if necessary.
+        
+        Unbounded callers (batch questions) wait as long as it takes and do
+        not fill the queue, but share the same max_concurrent slots.
+        """
+        if bounded:
+            self.check()
+        
+        self.waiting += 1
+        if not bounded:
+            self.backlog += 1
+        try:
+            if bounded:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            else:
+                await self._slots.acquire()
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise AdmissionRejected("Timed out waiting for a research slot", self.retry_after)
+        finally:
+            self.waiting -= 1
+            if not bounded:
+                self.backlog -= 1
+        
+        self.active += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and admission counters."""
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "backlog": self.backlog,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
@@ -0,0 +1,247 @@
+"""
+Background research jobs run by an in-process worker pool.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from api.admission import AdmissionRejected
+from utils.cache import SQLiteCache
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+@dataclass
+class Job:
+    """A submitted research request and what has happened to it so far."""
+    id: str
+    payload: Any
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, str] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = None
+    
+    def view(self) -> Dict[str, Any]:
+        """JSON-serializable status of the job."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+        }
+
+class JobProgress(BaseCallbackHandler):
+    """Marks each graph node of a job as running, done or failed."""
+    
+    run_inline = True
+    
+    def __init__(self, job: Job, manager: "JobManager"):
+        self.job = job
+        self.manager = manager
+        self._nodes: Dict[UUID, str] = {}
+    
+    def on_chain_start(
+        self, serialized: Any, inputs: Any, *, run_id: UUID, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._nodes[run_id] = node
+            self.manager.update_progress(self.job, node, "running")
+    
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any):
+        node = self._nodes.pop(run_id, None)
+        if node:
+            self.manager.update_progress(self.job, node, "done")
+    
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        node = self._nodes.pop(run_id, None)
+        if node:
+            self.manager.update_progress(self.job, node, "failed")
+
+class JobManager:
+    """Queues research jobs, runs them on a fixed pool of workers and keeps results for a while.
+    
+    With a store, job status is also written to the cache shared by every
+    worker on the host, so any worker can report on or cancel any job.
+    """
+    
+    def __init__(
+        self,
+        run: Callable[[Job], Awaitable[Dict[str, Any]]],
+        workers: int,
+        max_queue: int,
+        result_ttl: float,
+        retry_after: int,
+        store: Optional[SQLiteCache] = None,
+    ):
+        self.run = run
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.retry_after = retry_after
+        self.store = store
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.submitted = 0
+        self.rejected = 0
+    
+    def start(self):
+        """Start the worker pool on the running event loop."""
+        # Unbounded: cancelled jobs stay in it until a worker skips them, so only live jobs count as queued
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+    
+    async def stop(self):
+        """Stop the workers and cancel every job that has not finished."""
+        for job in self._jobs.values():
+            if job.status not in FINISHED:
+                self._cancel(job)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    @property
+    def queued(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return sum(1 for job in self._jobs.values() if job.status == QUEUED)
+    
+    def submit(self, payload: Any) -> Job:
+        """Queue a job, or reject it when the queue is full."""
+        self._expire()
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("Research job queue is full", self.retry_after)
+        
+        job = Job(id=uuid4().hex, payload=payload)
+        self._queue.put_nowait(job)
+        self._jobs[job.id] = job
+        self.submitted += 1
+        self._publish(job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a job run by this or, with a store, any other worker."""
+        self._expire()
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.view()
+        return self.store.peek(job_id) if self.store else None
+    
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job; finished jobs are returned unchanged."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            if job.status not in FINISHED:
+                self._cancel(job)
+            # A running job stops at its next await
+            view = job.view()
+            view["cancel_requested"] = job.status == RUNNING
+            return view
+        
+        # Owned by another worker, which sees the request at its next update
+        view = self.store.peek(job_id) if self.store else None
+        if view is not None and view["status"] not in FINISHED:
+            self.store.set(self._cancel_key(job_id), True)
+            view["cancel_requested"] = True
+        return view
+    
+    def update_progress(self, job: Job, node: str, state: str):
+        """Record a node transition of a running job."""
+        job.progress[node] = state
+        self._publish(job)
+    
+    def _cancel(self, job: Job):
+        """Cancel a local job, whether it is still queued or already running."""
+        if job.task is not None:
+            job.task.cancel()
+        else:
+            self._finish(job, CANCELLED)
+    
+    def _cancel_key(self, job_id: str) -> str:
+        return f"{job_id}:cancel"
+    
+    def _publish(self, job: Job):
+        """Share the job's status, acting on cancellations requested through other workers."""
+        if self.store is None:
+            return
+        if job.status == RUNNING and self.store.peek(self._cancel_key(job.id)):
+            job.task.cancel()
+        self.store.set(job.id, job.view())
+    
+    def _finish(self, job: Job, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.task = None
+        self._publish(job)
+    
+    def _expire(self):
+        """Forget finished jobs older than the retention TTL."""
+        cutoff = time.time() - self.result_ttl
+        for job_id in [job.id for job in self._jobs.values() if job.finished_at and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+    
+    async def _work(self):
+        """Run queued jobs one at a time."""
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == QUEUED:
+                    await self._run_job(job)
+            finally:
+                self._queue.task_done()
+    
+    async def _run_job(self, job: Job):
+        """Run one job in its own task so it can be cancelled without stopping the worker."""
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.task = asyncio.ensure_future(self.run(job))
+        self._publish(job)
+        try:
+            result = await job.task
+        except asyncio.CancelledError:
+            # Only the job was cancelled if its task is done; otherwise the worker is stopping
+            job_cancelled = job.task.cancelled()
+            self._finish(job, CANCELLED)
+            if not job_cancelled:
+                raise
+        except Exception as e:
+            self._finish(job, FAILED, error=str(e))
+        else:
+            error = result.get("error") if isinstance(result, dict) else None
+            self._finish(job, FAILED if error else SUCCEEDED, result=result, error=error)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and job counts by status."""
+        counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "jobs": counts,
+        }
@@ -1,48 +1,524 @@
+import asyncio
+import json
+import time
+from contextlib import AsyncExitStack, asynccontextmanager, nullcontext
 from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from typing import Optional
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.callbacks import BaseCallbackHandler
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+from api.admission import AdmissionController, AdmissionRejected
+from api.jobs import Job, JobManager, JobProgress
 from config.settings import Settings
 from core.graph_builder import ResearchGraphBuilder
 from core.state import ResearchState
+from utils.cache import SQLiteCache, normalize_query
+from utils.checkpoints import open_checkpointer, prune_checkpoints, run_config
+from utils.metrics import CACHE_ENTRIES, CACHE_HIT_RATIO, CACHE_LEASES, registry
+from utils.single_flight import SingleFlight
+from utils.snapshot_batcher import trigger_batch_window
+from utils.structured_logging import LogEntry, ResearchLogger, new_request_id, request_context, request_id_var
 
 load_dotenv()
 
-app = FastAPI(title="Multi-Source Research Agent API")
-
-# Build graph once at startup
 settings = Settings()
-graph_builder = ResearchGraphBuilder(settings)
-research_graph = graph_builder.build()
+
+# Built by the lifespan hook, so importing the app stays cheap
+graph_builder: Optional[ResearchGraphBuilder] = None
+research_graph = None
+checkpointer: Optional[BaseCheckpointSaver] = None
+logger: Optional[ResearchLogger] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the graph when a worker starts and release its connections on shutdown."""
+    global graph_builder, research_graph, checkpointer, logger
+    async with AsyncExitStack() as stack:
+        if settings.checkpoint_enabled:
+            checkpointer = await stack.enter_async_context(open_checkpointer(settings.checkpoint_path))
+        graph_builder = ResearchGraphBuilder(settings)
+        research_graph = graph_builder.build(checkpointer)
+        logger = graph_builder.logger
+        pruning = asyncio.ensure_future(prune_stale_runs()) if checkpointer else None
+        job_manager.start()
+        try:
+            yield
+        finally:
+            if pruning:
+                pruning.cancel()
+            await job_manager.stop()
+            await graph_builder.search_service.web_ops.client.aclose()
+            logger.close()
+            checkpointer = None
+
+app = FastAPI(title="Multi-Source Research Agent API", lifespan=lifespan)
+
+# Bound concurrent graph runs and the queue waiting for them
+admission = AdmissionController(
+    settings.max_concurrent_research,
+    settings.max_research_queue,
+    settings.research_queue_timeout,
+    settings.research_retry_after,
+)
+
+# Identical questions arriving together share one graph run
+coalescer = SingleFlight()
+
+# Complete answers are shared with the other workers on the host, which wait
+# for a question one of them is already researching instead of repeating it
+answer_cache = SQLiteCache(
+    settings.cache_path, "answers", settings.answer_cache_ttl, settings.answer_cache_max_entries
+) if settings.answer_cache_enabled else None
+
+# Marks runs some worker is executing, so a run is never resumed twice at once
+run_leases = SQLiteCache(settings.cache_path, "runs", settings.checkpoint_ttl, 1)
+# Runs executing in this worker; leases only tell workers apart
+active_runs: Set[str] = set()
+
+# Background jobs run on their own worker pool rather than taking admission slots
+job_manager = JobManager(
+    lambda job: run_job(job),
+    settings.job_workers,
+    settings.job_max_queue,
+    settings.job_result_ttl,
+    settings.research_retry_after,
+    store=SQLiteCache(settings.cache_path, "jobs", settings.job_result_ttl, settings.job_max_entries),
+)
+
+def active_caches() -> List[SQLiteCache]:
+    """Caches of the graph built for this worker, if it has started."""
+    if graph_builder is None:
+        return []
+    return [
+        cache for cache in (
+            graph_builder.search_service.web_ops.serp_cache,
+            graph_builder.search_service.web_ops.comment_cache,
+            graph_builder.search_service.web_ops.reddit_search_cache,
+            graph_builder.analysis_service.cache,
+            answer_cache,
+        ) if cache
+    ]
+
+CACHE_HIT_RATIO.add_collector(lambda: {(cache.namespace,): cache.stats()["hit_ratio"] for cache in active_caches()})
+CACHE_ENTRIES.add_collector(lambda: {(cache.namespace,): cache.stats()["entries"] for cache in active_caches()})
+CACHE_LEASES.add_collector(lambda: {(cache.namespace,): cache.stats()["leases"] for cache in active_caches()})
+registry.gauge("epistemo_research_runs", "Research runs admitted or queued.", ["state"]).add_collector(
+    lambda: {("active",): admission.active, ("waiting",): admission.waiting}
+)
+registry.gauge("epistemo_research_jobs", "Background research jobs kept by this worker.", ["status"]).add_collector(
+    lambda: {(status,): count for status, count in job_manager.stats()["jobs"].items()}
+)
+registry.gauge("epistemo_coalesced_runs_in_flight", "Distinct research runs shared by coalesced requests.").add_collector(
+    lambda: {(): coalescer.in_flight}
+)
 
 class QueryRequest(BaseModel):
     question: str
+    session_id: Optional[str] = None
+    bypass_llm_cache: bool = False
+    timeout_seconds: Optional[float] = Field(default=None, gt=0)
 
 class QueryResponse(BaseModel):
     answer: Optional[str] = None
     error: Optional[str] = None
+    dropped_sources: List[str] = []
+    reused_sources: List[str] = []
+    request_id: Optional[str] = None
+    run_id: Optional[str] = None
 
-@app.post("/research", response_model=QueryResponse)
-def research(query: QueryRequest):
-    try:
-        # Prepare initial state
-        initial_state: ResearchState = {
-            "messages": [{"role": "user", "content": query.question}],
-            "user_question": query.question,
-            "google_results": None,
-            "bing_results": None,
-            "reddit_results": None,
-            "selected_reddit_URLs": None,
-            "reddit_post_data": None,
-            "google_analysis": None,
-            "bing_analysis": None,
-            "reddit_analysis": None,
-            "final_answer": None,
-        }
-
-        # Run research synchronously
-        final_state = research_graph.invoke(initial_state)
-        return QueryResponse(answer=final_state.get("final_answer"))
+class ResumeRequest(BaseModel):
+    timeout_seconds: Optional[float] = Field(default=None, gt=0)
+
+class RunStatus(BaseModel):
+    run_id: str
+    status: str
+    next_nodes: List[str] = []
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, str] = {}
+    result: Optional[QueryResponse] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+
+class BatchQueryRequest(BaseModel):
+    questions: List[str]
+    bypass_llm_cache: bool = False
+    timeout_seconds: Optional[float] = Field(default=None, gt=0)
 
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]
+
+def create_initial_state(query: QueryRequest) -> ResearchState:
+    """Prepare the initial graph state for a request."""
+    timeout = query.timeout_seconds or settings.default_deadline_seconds
+    return {
+        "messages": [{"role": "user", "content": query.question}],
+        "user_question": query.question,
+        "session_id": query.session_id,
+        "bypass_llm_cache": query.bypass_llm_cache,
+        "deadline": time.time() + timeout,
+        "missing_sources": [],
+        "google_results": None,
+        "bing_results": None,
+        "reddit_results": None,
+        "selected_reddit_URLs": None,
+        "reddit_post_data": None,
+        "google_analysis": None,
+        "bing_analysis": None,
+        "reddit_analysis": None,
+        "final_answer": None,
+    }
+
+def overloaded_response(error: AdmissionRejected) -> JSONResponse:
+    """Tell the client to back off and retry later."""
+    return JSONResponse(
+        status_code=503,
+        content=QueryResponse(error=str(error)).model_dump(),
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def prune_stale_runs():
+    """Drop checkpoints of runs that were never resumed."""
+    try:
+        pruned = await prune_checkpoints(checkpointer, settings.checkpoint_ttl)
+        if pruned:
+            logger.info(f"Pruned checkpoints of {pruned} stale runs")
     except Exception as e:
-        return QueryResponse(error=str(e))
\ No newline at end of file
+        logger.warning(f"Checkpoint pruning failed: {e}")
+
+class RunConflict(Exception):
+    """Raised when a run is already executing or has nothing left to resume."""
+
+@asynccontextmanager
+async def run_lease(run_id: str) -> AsyncIterator[None]:
+    """Hold a run's lease for as long as it executes, renewing it so long runs keep it."""
+    if run_id in active_runs or not run_leases.acquire(run_id, settings.lease_ttl):
+        raise RunConflict("Run is running")
+    active_runs.add(run_id)
+    try:
+        async with run_leases.renewing(run_id, settings.lease_ttl):
+            yield
+    finally:
+        active_runs.discard(run_id)
+        run_leases.release(run_id)
+
+async def invoke_graph(
+    run_id: str,
+    graph_input: Optional[ResearchState],
+    deadline: Optional[float] = None,
+    callbacks: Optional[List[BaseCallbackHandler]] = None,
+) -> Dict[str, Any]:
+    """Run the graph, or resume it with None input, checkpointing under the run ID.
+    
+    Checkpoints of a run that finishes are deleted; those of a failed or
+    interrupted run are kept so it can be resumed. Raises RunConflict if the
+    run is already executing, or has nothing left to resume once its lease is held.
+    """
+    config = run_config(run_id, deadline) if checkpointer else {}
+    if callbacks:
+        config["callbacks"] = callbacks
+    if checkpointer is None:
+        return await research_graph.ainvoke(graph_input, config)
+    
+    async with run_lease(run_id):
+        # Another worker may have finished the run since it was found resumable
+        if graph_input is None and not (await research_graph.aget_state(run_config(run_id))).next:
+            raise RunConflict("Run has nothing left to resume")
+        final_state = await research_graph.ainvoke(graph_input, config)
+    await checkpointer.adelete_thread(run_id)
+    return final_state
+
+def research_response(final_state: Dict[str, Any], request_id: str, run_id: str) -> QueryResponse:
+    """Build the response for a finished run."""
+    return QueryResponse(
+        answer=final_state.get("final_answer"),
+        dropped_sources=final_state.get("missing_sources") or [],
+        reused_sources=final_state.get("reused_sources") or [],
+        request_id=request_id,
+        run_id=run_id,
+    )
+
+async def stream_research_events(initial_state: ResearchState) -> AsyncIterator[str]:
+    """Stream node progress and log entries, then the synthesized answer token by token."""
+    # The response runs in its own task, so the ID never leaks to other requests
+    request_id = new_request_id()
+    request_id_var.set(request_id)
+    yield format_sse("start", {"question": initial_state["user_question"], "request_id": request_id, "run_id": request_id})
+    
+    # Log entries arrive on the logging thread and are handed to this loop
+    loop = asyncio.get_running_loop()
+    logs: asyncio.Queue = asyncio.Queue()
+    
+    def forward(entry: LogEntry):
+        if entry["request_id"] == request_id:
+            loop.call_soon_threadsafe(logs.put_nowait, entry)
+    
+    unsubscribe = logger.subscribe(forward)
+    final_state: Dict[str, Any] = {}
+    try:
+        async with admission.slot(), run_lease(request_id) if checkpointer else nullcontext():
+            config = run_config(request_id) if checkpointer else None
+            async for event in research_graph.astream_events(initial_state, config, version="v2"):
+                while not logs.empty():
+                    yield format_sse("log", logs.get_nowait())
+                
+                kind = event["event"]
+                node = event["metadata"].get("langgraph_node")
+                
+                if kind == "on_chat_model_stream" and node == "synthesize_analyses":
+                    content = event["data"]["chunk"].content
+                    if content:
+                        yield format_sse("token", {"content": content})
+                elif kind in ("on_chain_start", "on_chain_end") and event["name"] == node:
+                    status = "node_start" if kind == "on_chain_start" else "node_end"
+                    yield format_sse(status, {"node": node})
+                elif kind == "on_chain_end" and not event["parent_ids"]:
+                    final_state = event["data"].get("output") or {}
+        
+        if checkpointer:
+            await checkpointer.adelete_thread(request_id)
+        
+        # Cached answers are never streamed, so always send the full text
+        while not logs.empty():
+            yield format_sse("log", logs.get_nowait())
+        yield format_sse("done", {
+            "answer": final_state.get("final_answer"),
+            "dropped_sources": final_state.get("missing_sources") or [],
+            "reused_sources": final_state.get("reused_sources") or [],
+        })
+    
+    except Exception as e:
+        logger.error(f"Streamed research failed: {e}")
+        yield format_sse("error", {"error": str(e), "run_id": request_id if checkpointer else None})
+    finally:
+        unsubscribe()
+
+def coalescing_key(query: QueryRequest) -> str:
+    """Key under which identical in-flight questions are collapsed."""
+    return f"{int(query.bypass_llm_cache)}:{query.timeout_seconds}:{query.session_id}:{normalize_query(query.question)}"
+
+async def run_research(query: QueryRequest, callbacks: Optional[List[BaseCallbackHandler]] = None) -> QueryResponse:
+    """Run the research graph for one question."""
+    with request_context() as request_id:
+        # The run is named after the request that started it
+        run_id = request_id if checkpointer else None
+        try:
+            final_state = await invoke_graph(run_id, create_initial_state(query), callbacks=callbacks)
+            return research_response(final_state, request_id, run_id)
+        except Exception as e:
+            logger.error(f"Research failed: {e}", run_id=run_id)
+            return QueryResponse(error=str(e), request_id=request_id, run_id=run_id)
+
+def shares_answer(query: QueryRequest) -> bool:
+    """Whether the question's answer can be served to, or from, other requests."""
+    # Follow-up answers depend on the session's earlier turns
+    return answer_cache is not None and not query.bypass_llm_cache and not query.session_id
+
+def shareable(response: Dict[str, Any]) -> bool:
+    """Failed and partial answers are returned but never shared."""
+    return bool(response["answer"]) and not response["dropped_sources"]
+
+async def run_shared_research(
+    query: QueryRequest, run: Callable[[QueryRequest], Awaitable[QueryResponse]]
+) -> QueryResponse:
+    """Serve an answer another worker produced, or produce it once for every worker."""
+    if not shares_answer(query):
+        return await run(query)
+    
+    async def compute() -> Dict[str, Any]:
+        return (await run(query)).model_dump()
+    
+    result = await answer_cache.get_or_compute(
+        normalize_query(query.question),
+        compute,
+        settings.lease_ttl,
+        min(settings.lease_wait_timeout, query.timeout_seconds or settings.default_deadline_seconds),
+        settings.lease_poll_interval,
+        should_store=shareable,
+    )
+    return QueryResponse(**result)
+
+async def run_job(job: Job) -> Dict[str, Any]:
+    """Research a job's question, recording which graph nodes have run.
+    
+    Jobs do not wait on other workers' runs, so cancelling one stops its run.
+    """
+    query: QueryRequest = job.payload
+    key = normalize_query(query.question)
+    if shares_answer(query):
+        cached = await answer_cache.aget(key)
+        if cached is not None:
+            return cached
+    
+    response = (await run_research(query, [JobProgress(job, job_manager)])).model_dump()
+    if shares_answer(query) and shareable(response):
+        await answer_cache.aset(key, response)
+    return response
+
+async def run_admitted_research(query: QueryRequest) -> QueryResponse:
+    """Run research on the shared event loop once a slot is free."""
+    async with admission.slot():
+        return await run_research(query)
+
+async def run_batched_research(query: QueryRequest) -> QueryResponse:
+    """Run a batch question once a slot is free, however long the wait."""
+    async with admission.slot(bounded=False):
+        return await run_research(query)
+
+@app.post("/research", response_model=QueryResponse)
+async def research(query: QueryRequest):
+    try:
+        # Duplicates attach to the leader's run and never take a slot themselves
+        return await coalescer.do(coalescing_key(query), lambda: run_shared_research(query, run_admitted_research))
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+
+@app.post("/research/batch", response_model=BatchQueryResponse)
+async def research_batch(batch: BatchQueryRequest):
+    if len(batch.questions) > settings.batch_max_questions:
+        return JSONResponse(
+            status_code=413,
+            content={"error": f"At most {settings.batch_max_questions} questions per batch"},
+        )
+    
+    limit = asyncio.Semaphore(settings.batch_max_concurrency)
+    
+    async def run_one(question: str) -> QueryResponse:
+        query = QueryRequest(
+            question=question, bypass_llm_cache=batch.bypass_llm_cache, timeout_seconds=batch.timeout_seconds
+        )
+        async with limit:
+            return await coalescer.do(coalescing_key(query), lambda: run_shared_research(query, run_batched_research))
+    
+    # Runs started below inherit the window, so their Reddit triggers share snapshots
+    token = trigger_batch_window.set(settings.batch_trigger_window)
+    try:
+        # Each question takes its own slot, so a batch shares max_concurrent_research with single requests
+        admission.check()
+        results = await asyncio.gather(*(run_one(question) for question in batch.questions))
+        return BatchQueryResponse(results=results)
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    finally:
+        trigger_batch_window.reset(token)
+
+@app.post("/research/stream")
+async def research_stream(query: QueryRequest):
+    # Reject before the stream starts; queueing happens inside the stream
+    try:
+        admission.check()
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    
+    return StreamingResponse(
+        stream_research_events(create_initial_state(query)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/research/jobs", response_model=JobStatus, status_code=202)
+async def submit_research_job(query: QueryRequest):
+    try:
+        job = job_manager.submit(query)
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    return job.view()
+
+@app.get("/research/jobs/{job_id}", response_model=JobStatus)
+async def research_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown job"})
+    return job
+
+@app.delete("/research/jobs/{job_id}", response_model=JobStatus)
+async def cancel_research_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown job"})
+    return job
+
+async def run_status(run_id: str) -> RunStatus:
+    """Whether a checkpointed run is running, resumable or unknown."""
+    snapshot = await research_graph.aget_state(run_config(run_id))
+    if not snapshot.values:
+        return RunStatus(run_id=run_id, status="unknown")
+    if run_id in active_runs or run_leases.leased(run_id):
+        status = "running"
+    else:
+        status = "resumable" if snapshot.next else "completed"
+    return RunStatus(run_id=run_id, status=status, next_nodes=list(snapshot.next))
+
+@app.get("/research/runs/{run_id}", response_model=RunStatus)
+async def research_run(run_id: str):
+    if checkpointer is None:
+        return JSONResponse(status_code=404, content={"error": "Checkpointing is disabled"})
+    return await run_status(run_id)
+
+@app.post("/research/runs/{run_id}/resume", response_model=QueryResponse)
+async def resume_research_run(run_id: str, resume: Optional[ResumeRequest] = None):
+    if checkpointer is None:
+        return JSONResponse(status_code=404, content=QueryResponse(error="Checkpointing is disabled").model_dump())
+    
+    status = await run_status(run_id)
+    if status.status == "unknown":
+        return JSONResponse(status_code=404, content=QueryResponse(error="Unknown run", run_id=run_id).model_dump())
+    if status.status != "resumable":
+        return JSONResponse(
+            status_code=409, content=QueryResponse(error=f"Run is {status.status}", run_id=run_id).model_dump()
+        )
+    
+    # Nodes still to run get a fresh deadline; completed ones are not run again
+    timeout = (resume and resume.timeout_seconds) or settings.default_deadline_seconds
+    try:
+        async with admission.slot():
+            with request_context() as request_id:
+                logger.info(f"Resuming run {run_id} at {', '.join(status.next_nodes)}", run_id=run_id)
+                try:
+                    final_state = await invoke_graph(run_id, None, time.time() + timeout)
+                    return research_response(final_state, request_id, run_id)
+                except RunConflict as e:
+                    return JSONResponse(
+                        status_code=409,
+                        content=QueryResponse(error=str(e), request_id=request_id, run_id=run_id).model_dump(),
+                    )
+                except Exception as e:
+                    logger.error(f"Resumed research failed: {e}", run_id=run_id)
+                    return QueryResponse(error=str(e), request_id=request_id, run_id=run_id)
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+
+@app.get("/research/admission")
+async def research_admission():
+    return admission.stats()
+
+
+@app.get("/research/jobs")
+async def research_jobs():
+    return job_manager.stats()
+
+
+@app.get("/research/coalescing")
+async def research_coalescing():
+    return coalescer.stats()
+
+
+@app.get("/research/logs")
+async def research_logs(request_id: Optional[str] = None, limit: int = 100):
+    return {"entries": logger.entries(request_id, limit)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
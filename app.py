@@ -1,9 +1,24 @@
+import json
 import streamlit as st
 import requests
+from uuid import uuid4
 
 st.set_page_config(page_title="Research Agent", layout="wide")
 
-API_URL = "http://localhost:8000/research"
+API_URL = "http://localhost:8000/research/stream"
+
+def iter_sse_events(response):
+    """Yield (event, data) pairs from a Server-Sent Events response."""
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
 
 # Initialize chat history
 if "messages" not in st.session_state:
@@ -12,6 +27,10 @@ if "messages" not in st.session_state:
 if "is_researching" not in st.session_state:
     st.session_state.is_researching = False
 
+# Follow-up questions reuse the results fetched for earlier ones
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid4().hex
+
 # Sidebar
 with st.sidebar:
     st.header("ℹ️ About")
@@ -34,6 +53,7 @@ with st.sidebar:
 
     if st.button("🗑️ Clear Chat History", use_container_width=True):
         st.session_state.messages = []
+        st.session_state.session_id = uuid4().hex
         st.rerun()
 
 # Main chat interface
@@ -61,24 +81,36 @@ if question := st.chat_input("Ask your research question...", disabled=st.sessio
     placeholder.info("⏳ Generating Answer...")
 
     try:
-        # Call FastAPI
-        response = requests.post(API_URL, json={"question": question})
-        if response.status_code == 200:
-            data = response.json()
-            final_answer = data.get("answer", "⚠️ No final answer generated")
-
-            # Save assistant reply
-            st.session_state.messages.append({"role": "assistant", "content": final_answer})
-
-            # Replace placeholder with final answer
-            placeholder.empty()  # remove "Generating Answer..."
-            with st.chat_message("assistant"):
-                st.markdown(final_answer)
-        else:
-            error_msg = f"❌ Request failed: {response.status_code}"
-            st.session_state.messages.append({"role": "assistant", "content": error_msg})
-            placeholder.empty()
-            with st.chat_message("assistant"):
-                st.markdown(error_msg)
+        # Stream progress and answer tokens from FastAPI
+        with requests.post(API_URL, json={"question": question, "session_id": st.session_state.session_id}, stream=True) as response:
+            if response.status_code == 200:
+                final_answer, partial_answer = None, ""
+                for event, data in iter_sse_events(response):
+                    if event == "node_start":
+                        placeholder.info(f"⏳ Generating Answer... ({data['node'].replace('_', ' ')})")
+                    elif event == "log" and not partial_answer:
+                        placeholder.info(f"⏳ Generating Answer... {data['message']}")
+                    elif event == "token":
+                        partial_answer += data["content"]
+                        placeholder.markdown(partial_answer + "▌")
+                    elif event == "done":
+                        final_answer = data.get("answer") or partial_answer
+                    elif event == "error":
+                        final_answer = f"❌ Research failed: {data['error']}"
+                final_answer = final_answer or "⚠️ No final answer generated"
+
+                # Save assistant reply
+                st.session_state.messages.append({"role": "assistant", "content": final_answer})
+
+                # Replace placeholder with final answer
+                placeholder.empty()  # remove "Generating Answer..."
+                with st.chat_message("assistant"):
+                    st.markdown(final_answer)
+            else:
+                error_msg = f"❌ Request failed: {response.status_code}"
+                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                placeholder.empty()
+                with st.chat_message("assistant"):
+                    st.markdown(error_msg)
     finally:
         st.session_state.is_researching = False
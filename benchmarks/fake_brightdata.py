@@ -0,0 +1,119 @@
+"""
+Local BrightData stand-in serving the SERP and dataset snapshot endpoints.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from benchmarks.profiles import BrightDataProfile
+
+@dataclass
+class FakeSnapshot:
+    """A triggered snapshot and the time it becomes ready."""
+    inputs: List[Dict[str, Any]]
+    ready_at: float
+
+def filler(rng: random.Random, chars: int) -> str:
+    """Pseudo-random words of roughly the given length."""
+    words = []
+    length = 0
+    while length < chars:
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:chars]
+
+def post_url(keyword: str, index: int) -> str:
+    """Stable Reddit post URL for the index-th result of a keyword."""
+    post_id = hashlib.sha1(f"{keyword}:{index}".encode()).hexdigest()[:7]
+    return f"https://www.reddit.com/r/benchmark/comments/{post_id}/post_{index}/"
+
+def create_app(profile: BrightDataProfile, seed: int = 0) -> FastAPI:
+    """Build the stand-in app; serve it to BrightDataClient through httpx.ASGITransport."""
+    app = FastAPI(title="BrightData stand-in")
+    rng = random.Random(seed)
+    snapshots: Dict[str, FakeSnapshot] = {}
+    
+    async def delay(latency):
+        await asyncio.sleep(latency.sample(rng))
+    
+    @app.post("/request")
+    async def serp_request(request: Request):
+        body = await request.json()
+        query = parse_qs(urlsplit(body.get("url", "")).query).get("q", [""])[0]
+        await delay(profile.serp_latency)
+        return {
+            "knowledge": {"title": query, "description": filler(rng, profile.serp_snippet_chars)},
+            "organic": [
+                {
+                    "link": f"https://example.com/{hashlib.sha1(query.encode()).hexdigest()[:8]}/{index}",
+                    "title": f"Result {index} for {query}",
+                    "description": filler(rng, profile.serp_snippet_chars),
+                }
+                for index in range(profile.serp_results)
+            ],
+        }
+    
+    @app.post("/datasets/v3/trigger")
+    async def trigger(request: Request):
+        inputs = await request.json()
+        await delay(profile.trigger_latency)
+        snapshot_id = f"s_{len(snapshots):06d}"
+        snapshots[snapshot_id] = FakeSnapshot(inputs, time.monotonic() + profile.snapshot_build_time.sample(rng))
+        return {"snapshot_id": snapshot_id}
+    
+    @app.get("/datasets/v3/progress/{snapshot_id}")
+    async def progress(snapshot_id: str):
+        await delay(profile.progress_latency)
+        snapshot = snapshots.get(snapshot_id)
+        if snapshot is None:
+            return JSONResponse(status_code=404, content={"error": "unknown snapshot"})
+        return {"status": "ready" if time.monotonic() >= snapshot.ready_at else "running"}
+    
+    @app.get("/datasets/v3/snapshot/{snapshot_id}")
+    async def download(snapshot_id: str):
+        await delay(profile.download_latency)
+        snapshot = snapshots.get(snapshot_id)
+        if snapshot is None:
+            return JSONResponse(status_code=404, content={"error": "unknown snapshot"})
+        body = "\n".join(json.dumps(row) for row in snapshot_rows(snapshot.inputs, profile, rng))
+        return Response(body, media_type="application/x-ndjson")
+    
+    return app
+
+def snapshot_rows(inputs: List[Dict[str, Any]], profile: BrightDataProfile, rng: random.Random) -> List[Dict[str, Any]]:
+    """Rows for a discovery (keyword) or comments (url) snapshot."""
+    rows = []
+    for item in inputs:
+        if "keyword" in item:
+            rows.extend(
+                {
+                    "title": f"Post {index} about {item['keyword']}",
+                    "url": post_url(item["keyword"], index),
+                    "description": filler(rng, profile.post_description_chars),
+                    "num_comments": rng.randint(0, 500),
+                    "num_upvotes": rng.randint(0, 5000),
+                    "discovery_input": {"keyword": item["keyword"]},
+                }
+                for index in range(profile.posts_per_keyword)
+            )
+        else:
+            rows.extend(
+                {
+                    "comment_id": f"{hashlib.sha1(item['url'].encode()).hexdigest()[:7]}_{index}",
+                    "comment": filler(rng, profile.comment_chars),
+                    "date_posted": "2025-01-01T00:00:00Z",
+                    "post_url": item["url"],
+                }
+                for index in range(profile.comments_per_post)
+            )
+    return rows
@@ -0,0 +1,86 @@
+"""
+Chat model stand-in with configurable latency and output size.
+"""
+
+import asyncio
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Type
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, PrivateAttr
+
+from benchmarks.profiles import ChatProfile
+from utils.tokens import estimate_tokens
+
+REDDIT_URL = re.compile(r"https://www\.reddit\.com/r/[^'\"\s,]+")
+
+class FakeChatModel(BaseChatModel):
+    """Answers with filler text after a sampled first-token delay and a steady token rate."""
+    
+    profile: ChatProfile = ChatProfile()
+    seed: int = 0
+    model_name: str = "fake-chat-model"
+    _rng: random.Random = PrivateAttr()
+    
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+    
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+    
+    def _usage(self, messages: List[BaseMessage], output_tokens: int) -> Dict[str, int]:
+        """Token usage in the shape chat models report it."""
+        input_tokens = sum(estimate_tokens(str(message.content)) for message in messages)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+    
+    def _token_delay(self) -> float:
+        """Seconds between two output tokens."""
+        return 1.0 / self.profile.tokens_per_second if self.profile.tokens_per_second > 0 else 0.0
+    
+    def _answer(self) -> str:
+        """Filler answer of profile.output_tokens tokens."""
+        return " ".join(f"token{index}" for index in range(self.profile.output_tokens))
+    
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.profile.first_token_latency.sample(self._rng) + self._token_delay() * self.profile.output_tokens)
+        message = AIMessage(content=self._answer(), usage_metadata=self._usage(messages, self.profile.output_tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+    
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.profile.first_token_latency.sample(self._rng) + self._token_delay() * self.profile.output_tokens)
+        message = AIMessage(content=self._answer(), usage_metadata=self._usage(messages, self.profile.output_tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+    
+    async def _astream(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.profile.first_token_latency.sample(self._rng))
+        for index in range(self.profile.output_tokens):
+            await asyncio.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=f"token{index} "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+    
+    def with_structured_output(self, schema: Type[BaseModel], *, include_raw: bool = False, **kwargs: Any):
+        """Select the first profile.selected_urls Reddit URLs found in the prompt."""
+        
+        async def respond(messages: List[Dict[str, str]], config: Any = None) -> Any:
+            await asyncio.sleep(self.profile.first_token_latency.sample(self._rng) + self._token_delay() * 20)
+            prompt = " ".join(str(message["content"]) for message in messages)
+            urls = list(dict.fromkeys(REDDIT_URL.findall(prompt)))[:self.profile.selected_urls]
+            parsed = schema(selected_URLs=urls)
+            if not include_raw:
+                return parsed
+            input_tokens = estimate_tokens(prompt)
+            raw = AIMessage(content="", usage_metadata={"input_tokens": input_tokens, "output_tokens": 20, "total_tokens": input_tokens + 20})
+            return {"raw": raw, "parsed": parsed, "parsing_error": None}
+        
+        return RunnableLambda(respond)
@@ -0,0 +1,217 @@
+"""
+Benchmark the research graph offline against the BrightData and chat model stand-ins.
+
+Example:
+    python -m benchmarks.graph_benchmark --requests 20 --concurrency 5 --time-scale 0.1
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import os
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+
+from benchmarks.fake_brightdata import create_app
+from benchmarks.fake_chat_model import FakeChatModel
+from benchmarks.profiles import BrightDataProfile, ChatProfile
+from config.settings import Settings
+from core.graph_builder import ResearchGraphBuilder
+from core.state import ResearchState
+from services.analysis_service import AnalysisService
+from services.search_service import SearchService
+from utils.cache import SQLiteCache
+from utils.http_client import BrightDataClient
+from utils.structured_logging import ResearchLogger
+
+def percentile(values: List[float], q: float) -> float:
+    """Linearly interpolated percentile, q in [0, 100]."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Count, mean and tail percentiles of a list of durations."""
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": max(values, default=0.0),
+    }
+
+class NodeTimer(BaseCallbackHandler):
+    """Records the duration of every graph node run, including pipeline subgraph nodes."""
+    
+    run_inline = True
+    
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self._started: Dict[UUID, tuple] = {}
+    
+    def on_chain_start(
+        self, serialized: Any, inputs: Any, *, run_id: UUID, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._started[run_id] = (node, time.perf_counter())
+    
+    def _finish(self, run_id: UUID):
+        started = self._started.pop(run_id, None)
+        if started:
+            node, start = started
+            self.durations[node].append(time.perf_counter() - start)
+    
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id)
+    
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id)
+
+def build_graph(
+    settings: Settings, brightdata: BrightDataProfile, chat: ChatProfile, seed: int = 0
+) -> ResearchGraphBuilder:
+    """Wire the real graph to the stand-ins instead of BrightData and OpenAI."""
+    logger = ResearchLogger(level="WARNING", console=False)
+    client = BrightDataClient(settings, transport=httpx.ASGITransport(app=create_app(brightdata, seed)))
+    llm_cache = SQLiteCache(
+        settings.cache_path, "llm", settings.llm_cache_ttl, settings.llm_cache_max_entries
+    ) if settings.llm_cache_enabled else None
+    return ResearchGraphBuilder(
+        settings,
+        SearchService(settings, logger, client),
+        AnalysisService(settings, FakeChatModel(profile=chat, seed=seed), llm_cache, logger),
+        logger,
+    )
+
+def initial_state(question: str, timeout: Optional[float]) -> ResearchState:
+    """Initial graph state for one benchmark request."""
+    return {
+        "messages": [{"role": "user", "content": question}],
+        "user_question": question,
+        "deadline": time.time() + timeout if timeout else None,
+        "missing_sources": [],
+    }
+
+async def run_benchmark(
+    builder: ResearchGraphBuilder,
+    requests: int,
+    concurrency: int,
+    distinct_questions: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Run the graph for a number of questions and summarize the latencies."""
+    graph = builder.build()
+    timer = NodeTimer()
+    limit = asyncio.Semaphore(concurrency)
+    end_to_end: List[float] = []
+    dropped: Dict[str, int] = defaultdict(int)
+    errors = 0
+    
+    async def run_one(index: int):
+        nonlocal errors
+        question = f"benchmark question {index % (distinct_questions or requests)}"
+        async with limit:
+            start = time.perf_counter()
+            try:
+                final_state = await graph.ainvoke(initial_state(question, timeout), {"callbacks": [timer]})
+            except Exception:
+                errors += 1
+                return
+            end_to_end.append(time.perf_counter() - start)
+            for source in final_state.get("missing_sources") or []:
+                dropped[source] += 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(run_one(index) for index in range(requests)))
+    wall_time = time.perf_counter() - start
+    
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "dropped_sources": dict(dropped),
+        "wall_time": wall_time,
+        "throughput": len(end_to_end) / wall_time if wall_time else 0.0,
+        "end_to_end": summarize(end_to_end),
+        "nodes": {node: summarize(values) for node, values in sorted(timer.durations.items())},
+    }
+
+def print_report(report: Dict[str, Any]):
+    """Print the latency summary as a table."""
+    print(
+        f"{report['requests']} requests, concurrency {report['concurrency']}, "
+        f"{report['errors']} errors, {report['wall_time']:.2f}s wall, {report['throughput']:.2f} req/s"
+    )
+    if report["dropped_sources"]:
+        print(f"dropped sources: {report['dropped_sources']}")
+    print(f"{'':28}{'count':>7}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    rows = [("end_to_end", report["end_to_end"])] + list(report["nodes"].items())
+    for name, stats in rows:
+        print(
+            f"{name:28}{stats['count']:>7}"
+            + "".join(f"{stats[key]:>9.3f}" for key in ("mean", "p50", "p90", "p99", "max"))
+        )
+
+def apply_overrides(settings: Settings, overrides: List[str]):
+    """Apply key=value overrides to settings fields, converting to the field's type."""
+    types = {item.name: type(item.default) for item in dataclasses.fields(settings)}
+    for override in overrides:
+        key, _, value = override.partition("=")
+        if key not in types:
+            raise SystemExit(f"Unknown setting: {key}")
+        if types[key] is bool:
+            setattr(settings, key, value.lower() in ("1", "true", "yes"))
+        elif types[key] in (int, float):
+            setattr(settings, key, types[key](value))
+        else:
+            setattr(settings, key, value)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--distinct-questions", type=int, default=None, help="repeat questions to exercise caches")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiply every simulated delay and poll interval")
+    parser.add_argument("--timeout", type=float, default=None, help="per-request deadline in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a Settings field, e.g. --set llm_cache_enabled=false")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+    
+    settings = Settings()
+    # A fresh cache per run keeps results reproducible
+    settings.cache_path = os.path.join(tempfile.mkdtemp(prefix="epistemo-bench-"), "cache.sqlite3")
+    settings.poll_initial_delay *= args.time_scale
+    settings.poll_max_delay *= args.time_scale
+    settings.poll_timeout *= args.time_scale
+    apply_overrides(settings, args.overrides)
+    
+    builder = build_graph(
+        settings, BrightDataProfile().scaled(args.time_scale), ChatProfile().scaled(args.time_scale), args.seed
+    )
+    report = asyncio.run(run_benchmark(builder, args.requests, args.concurrency, args.distinct_questions, args.timeout))
+    report["settings_overrides"] = args.overrides
+    report["time_scale"] = args.time_scale
+    
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Latency distributions and payload sizes for the offline stand-ins.
+"""
+
+import math
+import random
+from dataclasses import dataclass, field, fields, replace
+
+@dataclass
+class Latency:
+    """Log-normal latency given by its median and spread; a spread of 0 is a fixed delay."""
+    median: float
+    spread: float = 0.0
+    
+    def sample(self, rng: random.Random) -> float:
+        """Draw one delay in seconds."""
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(self.spread * rng.gauss(0.0, 1.0))
+    
+    def scaled(self, factor: float) -> "Latency":
+        """Return the same distribution with every delay multiplied by factor."""
+        return replace(self, median=self.median * factor)
+
+@dataclass
+class BrightDataProfile:
+    """Timings and payload sizes of the BrightData stand-in."""
+    serp_latency: Latency = field(default_factory=lambda: Latency(1.5, 0.3))
+    trigger_latency: Latency = field(default_factory=lambda: Latency(0.3, 0.2))
+    progress_latency: Latency = field(default_factory=lambda: Latency(0.1, 0.2))
+    snapshot_build_time: Latency = field(default_factory=lambda: Latency(8.0, 0.4))
+    download_latency: Latency = field(default_factory=lambda: Latency(0.5, 0.3))
+    serp_results: int = 10
+    serp_snippet_chars: int = 300
+    posts_per_keyword: int = 30
+    post_description_chars: int = 400
+    comments_per_post: int = 40
+    comment_chars: int = 300
+    
+    def scaled(self, factor: float) -> "BrightDataProfile":
+        """Return the profile with every latency multiplied by factor."""
+        return replace(self, **{
+            item.name: getattr(self, item.name).scaled(factor)
+            for item in fields(self) if isinstance(getattr(self, item.name), Latency)
+        })
+
+@dataclass
+class ChatProfile:
+    """Timings and output sizes of the fake chat model."""
+    first_token_latency: Latency = field(default_factory=lambda: Latency(0.6, 0.3))
+    tokens_per_second: float = 60.0
+    output_tokens: int = 300
+    selected_urls: int = 5
+    
+    def scaled(self, factor: float) -> "ChatProfile":
+        """Return the profile with its latencies multiplied by factor."""
+        return replace(
+            self,
+            first_token_latency=self.first_token_latency.scaled(factor),
+            tokens_per_second=self.tokens_per_second / factor if factor > 0 else 0.0,
+        )
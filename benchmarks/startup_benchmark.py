@@ -0,0 +1,135 @@
+"""
+Measure how long a fresh worker takes to import the app and become ready.
+
+Every sample runs in a new interpreter, so nothing is shared between runs.
+
+Example:
+    python -m benchmarks.startup_benchmark --runs 5 --top 15
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.graph_benchmark import summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load when something actually needs them
+HEAVY_MODULES = ["streamlit", "langchain", "langchain_openai", "openai", "pandas"]
+
+SCENARIOS = {
+    "api_import": "import api.research",
+    "api_ready": (
+        "import asyncio\n"
+        "import api.research as research\n"
+        "async def start():\n"
+        "    async with research.lifespan(research.app):\n"
+        "        pass\n"
+        "asyncio.run(start())"
+    ),
+    "cli_ready": (
+        "from config.settings import Settings\n"
+        "from core.graph_builder import ResearchGraphBuilder\n"
+        "from cli.interface import ChatInterface\n"
+        "ChatInterface(ResearchGraphBuilder(Settings()).build())"
+    ),
+}
+
+CHILD = """
+import json as _json, sys as _sys, time as _time
+_started = _time.perf_counter()
+exec(compile({code!r}, "<scenario>", "exec"))
+_elapsed = _time.perf_counter() - _started
+print(_json.dumps({{"seconds": _elapsed, "modules": [name for name in {heavy!r} if name in _sys.modules]}}))
+"""
+
+def child_env(cache_dir: str) -> Dict[str, str]:
+    """Environment for a sample: throwaway caches and a placeholder API key if none is set."""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "startup-benchmark")
+    env["CACHE_PATH"] = os.path.join(cache_dir, "cache.sqlite3")
+    env["CHECKPOINT_PATH"] = os.path.join(cache_dir, "checkpoints.sqlite3")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    return env
+
+def run_sample(scenario: str, env: Dict[str, str]) -> Dict[str, Any]:
+    """Run one scenario in a new interpreter and return its timings."""
+    code = CHILD.format(code=SCENARIOS[scenario], heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    process_seconds = time.perf_counter() - start
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample["process_seconds"] = process_seconds
+    return sample
+
+def slowest_imports(scenario: str, env: Dict[str, str], top: int) -> List[Dict[str, Any]]:
+    """Top-level imports with the largest cumulative time, from -X importtime."""
+    code = CHILD.format(code=SCENARIOS[scenario], heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under the module that pulled them in
+        if cumulative.strip().isdigit() and not name[1:].startswith(" "):
+            imports.append({"module": name.strip(), "seconds": int(cumulative) / 1e6})
+    return sorted(imports, key=lambda item: item["seconds"], reverse=True)[:top]
+
+def run_benchmark(scenarios: List[str], runs: int) -> Dict[str, Any]:
+    """Sample every scenario a number of times and summarize the timings."""
+    report: Dict[str, Any] = {"runs": runs, "scenarios": {}}
+    with tempfile.TemporaryDirectory(prefix="epistemo-startup-") as cache_dir:
+        env = child_env(cache_dir)
+        for scenario in scenarios:
+            samples = [run_sample(scenario, env) for _ in range(runs)]
+            report["scenarios"][scenario] = {
+                "in_process": summarize([sample["seconds"] for sample in samples]),
+                "process": summarize([sample["process_seconds"] for sample in samples]),
+                "heavy_modules": samples[-1]["modules"],
+            }
+    return report
+
+def print_report(report: Dict[str, Any]):
+    """Print the startup timings as a table."""
+    print(f"{report['runs']} runs per scenario; 'process' includes interpreter start")
+    print(f"{'':14}{'p50':>9}{'p90':>9}{'process p50':>13}  heavy modules loaded")
+    for scenario, stats in report["scenarios"].items():
+        print(
+            f"{scenario:14}{stats['in_process']['p50']:>9.3f}{stats['in_process']['p90']:>9.3f}"
+            f"{stats['process']['p50']:>13.3f}  {', '.join(stats['heavy_modules']) or '-'}"
+        )
+    for item in report.get("slowest_imports", []):
+        print(f"  {item['seconds']:>7.3f}s  {item['module']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scenario", dest="scenarios", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to measure, repeatable (default: all)")
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports of api_ready")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+    
+    report = run_benchmark(args.scenarios or list(SCENARIOS), args.runs)
+    if args.top:
+        with tempfile.TemporaryDirectory(prefix="epistemo-startup-") as cache_dir:
+            report["slowest_imports"] = slowest_imports("api_ready", child_env(cache_dir), args.top)
+    
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@
 Command-line interface for the research agent.
 """
 
+import asyncio
 from typing import Dict, Any
+from uuid import uuid4
 from core.state import ResearchState
 
 class ChatInterface:
@@ -10,6 +12,8 @@ class ChatInterface:
     
     def __init__(self, graph):
         self.graph = graph
+        # Follow-up questions in one run reuse what earlier questions fetched
+        self.session_id = uuid4().hex
     
     def run(self):
         """Run the interactive chat interface."""
@@ -29,7 +33,7 @@ class ChatInterface:
             print("Launching Google, Bing, and Reddit searches...\n")
             
             try:
-                final_state = self.graph.invoke(initial_state)
+                final_state = asyncio.run(self.graph.ainvoke(initial_state))
                 self._display_results(final_state)
             except Exception as e:
                 print(f"Error during research: {e}")
@@ -41,6 +45,7 @@ class ChatInterface:
         return {
             "messages": [{"role": "user", "content": user_input}],
             "user_question": user_input,
+            "session_id": self.session_id,
             "google_results": None,
             "bing_results": None,
             "reddit_results": None,
@@ -54,6 +59,10 @@ class ChatInterface:
     
     def _display_results(self, final_state: Dict[str, Any]):
         """Display the research results."""
+        reused_sources = final_state.get("reused_sources")
+        if reused_sources:
+            print(f"Reused earlier results from: {', '.join(reused_sources)}")
+        
         final_answer = final_state.get("final_answer")
         if final_answer:
             print(f"\nFinal Answer:\n{final_answer}\n")
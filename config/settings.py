@@ -4,7 +4,14 @@ Configuration settings for the research agent.
 
 import os
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Optional
+
+@dataclass(frozen=True)
+class ModelConfig:
+    """Chat model, request timeout and output limit for one graph node."""
+    model_name: str
+    timeout: Optional[float] = None
+    max_tokens: Optional[int] = None
 
 @dataclass
 class Settings:
@@ -14,22 +21,131 @@ class Settings:
     brightdata_api_key: str = None
     posts_dataset_id: str = None
     comments_dataset_id: str = None
+    brightdata_base_url: str = "https://api.brightdata.com"
     
-    # LLM Configuration
+    # LLM Configuration: the large model writes the final answer, a fast one does the rest
     model_name: str = "gpt-4o"
+    fast_model_name: str = "gpt-4o-mini"
+    # Per-node overrides; nodes not listed use model_name
+    node_models: Optional[Dict[str, ModelConfig]] = None
+    
+    # LLM Rate Limit Configuration: budgets per model, shared by every request in the process
+    llm_rate_limit_enabled: bool = True
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 150000
+    llm_max_retries: int = 5
+    llm_retry_base_delay: float = 1.0
+    llm_retry_max_delay: float = 30.0
     
     # Search Configuration
     default_reddit_posts: int = 30
     default_days_back: int = 10
     default_load_all_replies: bool = False
     default_comment_limit: str = ""
+    reddit_prefetch_top_k: int = 5
+    
+    # API Configuration
+    max_concurrent_research: int = 32
+    max_research_queue: int = 64
+    research_queue_timeout: float = 30.0
+    research_retry_after: int = 5
+    batch_max_questions: int = 1000
+    batch_max_concurrency: int = 200
+    batch_trigger_window: float = 5.0
+    batch_max_inputs: int = 500
+    default_deadline_seconds: float = 120.0
+    synthesis_reserve_seconds: float = 20.0
+    
+    # Job Configuration: background research submitted through /research/jobs
+    job_workers: int = 4
+    job_max_queue: int = 100
+    job_result_ttl: float = 60 * 60
+    job_max_entries: int = 5000
+    
+    # Prompt Configuration
+    serp_max_results: int = 10
+    serp_max_snippet_chars: int = 300
+    serp_prompt_token_budget: int = 2000
+    # Longest Bing waits for Google's results to drop links both engines returned
+    serp_dedupe_wait: float = 10.0
+    reddit_single_pass_tokens: int = 6000
+    reddit_chunk_tokens: int = 3000
+    reddit_map_concurrency: int = 4
+    
+    # HTTP Configuration
+    http_timeout: float = 30.0
+    http_connect_timeout: float = 10.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_max_connections_per_host: int = 50
+    
+    # Cache Configuration
+    cache_path: str = ".cache/epistemo.sqlite3"
+    serp_cache_enabled: bool = True
+    serp_cache_ttl: float = 6 * 60 * 60
+    serp_cache_max_entries: int = 5000
+    comment_cache_enabled: bool = True
+    comment_cache_ttl: float = 60 * 60
+    comment_cache_max_entries: int = 2000
+    reddit_search_cache_enabled: bool = True
+    reddit_search_cache_ttl: float = 30 * 60
+    reddit_search_cache_max_entries: int = 2000
+    llm_cache_enabled: bool = True
+    llm_cache_ttl: float = 24 * 60 * 60
+    llm_cache_max_entries: int = 5000
+    answer_cache_enabled: bool = True
+    answer_cache_ttl: float = 60 * 60
+    answer_cache_max_entries: int = 2000
+    # Leases let workers wait for a result another worker is already computing
+    lease_ttl: float = 180.0
+    lease_wait_timeout: float = 150.0
+    lease_poll_interval: float = 0.25
+    
+    # Checkpoint Configuration: failed or interrupted API runs resume from their last completed node
+    checkpoint_enabled: bool = True
+    checkpoint_path: str = ".cache/checkpoints.sqlite3"
+    checkpoint_ttl: float = 24 * 60 * 60
+    
+    # Session Configuration: follow-up turns reuse what earlier turns fetched
+    session_ttl: float = 60 * 60
+    session_max_entries: int = 1000
+    session_history_turns: int = 5
+    
+    # Logging Configuration
+    log_level: str = "INFO"
+    log_buffer_size: int = 1000
+    log_to_console: bool = True
     
     # Polling Configuration
-    max_poll_attempts: int = 60
-    poll_delay: int = 5
+    poll_timeout: float = 300.0
+    poll_initial_delay: float = 1.0
+    poll_max_delay: float = 15.0
+    poll_backoff_factor: float = 1.5
+    poll_jitter: float = 0.2
+    snapshot_max_records: int = 20000
     
     def __post_init__(self):
         """Load environment variables after initialization."""
         self.brightdata_api_key = os.getenv("BRIGHTDATA_API_KEY")
         self.posts_dataset_id = os.getenv("POSTS_DATASET_ID")
-        self.comments_dataset_id = os.getenv("COMMENTS_DATASET_ID")
\ No newline at end of file
+        self.comments_dataset_id = os.getenv("COMMENTS_DATASET_ID")
+        self.cache_path = os.getenv("CACHE_PATH", self.cache_path)
+        self.checkpoint_path = os.getenv("CHECKPOINT_PATH", self.checkpoint_path)
+        self.log_level = os.getenv("LOG_LEVEL", self.log_level)
+        if self.node_models is None:
+            self.node_models = self.default_node_models()
+    
+    def default_node_models(self) -> Dict[str, ModelConfig]:
+        """Fast model for planning, URL selection and per-source analysis; large model for synthesis."""
+        return {
+            "plan_followup": ModelConfig(self.fast_model_name, timeout=20.0, max_tokens=200),
+            "analyze_reddit_posts": ModelConfig(self.fast_model_name, timeout=30.0, max_tokens=500),
+            "analyze_google_results": ModelConfig(self.fast_model_name, timeout=45.0, max_tokens=1500),
+            "analyze_bing_results": ModelConfig(self.fast_model_name, timeout=45.0, max_tokens=1500),
+            "analyze_reddit_results": ModelConfig(self.fast_model_name, timeout=60.0, max_tokens=1500),
+            "synthesize_analyses": ModelConfig(self.model_name, timeout=90.0, max_tokens=4000),
+        }
+    
+    def model_for(self, node: str) -> ModelConfig:
+        """Model configuration used by a graph node."""
+        return self.node_models.get(node) or ModelConfig(self.model_name)
@@ -2,72 +2,230 @@
 Graph builder for the research agent workflow.
 """
 
+import asyncio
+import inspect
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, START, END
-from langchain.chat_models import init_chat_model
 
-from config.settings import Settings
-from core.state import ResearchState
+from config.settings import ModelConfig, Settings
+from core.state import (
+    ResearchState,
+    GooglePipelineOutput,
+    BingPipelineOutput,
+    RedditPipelineOutput,
+)
 from services.search_service import SearchService
 from services.analysis_service import AnalysisService
+from services.session_service import SessionService
+from utils.cache import SQLiteCache
+from utils.metrics import NODE_LATENCY
+from utils.structured_logging import ResearchLogger
+
+SOURCE_PIPELINES = ["google_pipeline", "bing_pipeline", "reddit_pipeline"]
+
+Step = Tuple[str, Callable[..., Any]]
+
+Node = Callable[[ResearchState, RunnableConfig], Awaitable[Dict[str, Any]]]
+
+def with_config(node: Callable[..., Any]) -> Node:
+    """Adapt a node to take (state, config) whether or not it accepts config."""
+    if "config" in inspect.signature(node).parameters:
+        return node
+    return lambda state, config: node(state)
 
 class ResearchGraphBuilder:
     """Builds and configures the research workflow graph."""
     
-    def __init__(self, settings: Settings):
+    def __init__(
+        self,
+        settings: Settings,
+        search_service: Optional[SearchService] = None,
+        analysis_service: Optional[AnalysisService] = None,
+        logger: Optional[ResearchLogger] = None,
+        session_service: Optional[SessionService] = None,
+    ):
         self.settings = settings
-        self.llm = init_chat_model(settings.model_name)
-        self.search_service = SearchService(settings)
-        self.analysis_service = AnalysisService(self.llm)
+        self.logger = logger or ResearchLogger(
+            level=settings.log_level, capacity=settings.log_buffer_size, console=settings.log_to_console
+        )
+        self.llm, self.node_llms = (None, {}) if analysis_service else self._build_llms()
+        self.search_service = search_service or SearchService(settings, self.logger)
+        self.analysis_service = analysis_service or AnalysisService(
+            settings, self.llm, self._build_llm_cache(), self.logger, self.node_llms
+        )
+        self.session_service = session_service or SessionService(settings, self.analysis_service, self.logger)
     
-    def build(self) -> StateGraph:
-        """Build and compile the research graph."""
+    def _build_llms(self) -> Tuple[Any, Dict[str, Any]]:
+        """Create the default chat model and one client per node model configuration.
+        
+        Nodes with identical configurations share a client.
+        """
+        clients: Dict[ModelConfig, Any] = {}
+        
+        def client(model: ModelConfig):
+            if model not in clients:
+                clients[model] = self._build_llm(model)
+            return clients[model]
+        
+        default = client(ModelConfig(self.settings.model_name))
+        return default, {node: client(model) for node, model in self.settings.node_models.items()}
+    
+    def _build_llm(self, model: ModelConfig):
+        """Create a chat model, importing the provider integration only when it is needed."""
+        from langchain.chat_models import init_chat_model
+        options = {"timeout": model.timeout, "max_tokens": model.max_tokens}
+        if self.settings.llm_rate_limit_enabled:
+            # The shared rate limiter retries, so the client must not retry on its own as well
+            options["max_retries"] = 0
+        return init_chat_model(model.model_name, **{key: value for key, value in options.items() if value is not None})
+    
+    def _build_llm_cache(self) -> Optional[SQLiteCache]:
+        """Create the shared LLM response cache if it is enabled."""
+        if not self.settings.llm_cache_enabled:
+            return None
+        return SQLiteCache(
+            self.settings.cache_path, "llm", self.settings.llm_cache_ttl, self.settings.llm_cache_max_entries
+        )
+    
+    def build(self, checkpointer: Optional[BaseCheckpointSaver] = None) -> StateGraph:
+        """Build and compile the research graph.
+        
+        With a checkpointer, every completed node is saved under the run's
+        thread_id, and invoking the graph with None input for that thread
+        resumes the run where it stopped. Source pipelines inherit the
+        checkpointer, so their finished steps are kept too.
+        """
         graph_builder = StateGraph(ResearchState)
         
         # Add nodes
-        self._add_search_nodes(graph_builder)
+        self._add_source_pipelines(graph_builder)
         self._add_analysis_nodes(graph_builder)
+        self._add_session_nodes(graph_builder)
         
         # Add edges
         self._add_edges(graph_builder)
         
-        return graph_builder.compile()
+        return graph_builder.compile(checkpointer=checkpointer)
     
-    def _add_search_nodes(self, builder: StateGraph):
-        """Add search-related nodes to the graph."""
-        builder.add_node("google_search", self.search_service.google_search)
-        builder.add_node("bing_search", self.search_service.bing_search)
-        builder.add_node("reddit_search", self.search_service.reddit_search)
-        builder.add_node("analyze_reddit_posts", self.analysis_service.analyze_reddit_posts)
-        builder.add_node("retrieve_reddit_posts", self.search_service.retrieve_reddit_posts)
+    def _build_pipeline(self, output_schema: type, steps: List[Step]):
+        """Compile a chain of steps that runs independently of other sources.
+        
+        A pipeline is one graph node, so its steps never wait for another
+        source's: within a graph, every node of a superstep waits for the rest.
+        """
+        pipeline = StateGraph(ResearchState, output_schema=output_schema)
+        previous = START
+        for name, node in steps:
+            pipeline.add_node(name, self._timed(name, node))
+            pipeline.add_edge(previous, name)
+            previous = name
+        pipeline.add_edge(previous, END)
+        compiled = pipeline.compile()
+        
+        # Run the pipeline from a plain node rather than adding it as a graph
+        # node: streamed runs would otherwise write back its full state
+        async def run_pipeline(state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+            return await compiled.ainvoke(state, config)
+        
+        return run_pipeline
+    
+    def _timed(self, name: str, node: Callable[..., Any]) -> Node:
+        """Wrap a node to record its latency."""
+        node = with_config(node)
+        
+        async def run(state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+            with NODE_LATENCY.time(node=name):
+                return await node(state, config)
+        
+        return run
+    
+    def _with_deadline(self, source: str, node: Callable[..., Any]) -> Node:
+        """Wrap a source's node so it gives up once the request deadline passes.
+        
+        A source that runs out of time is recorded in missing_sources and the
+        rest of its chain is skipped. synthesis_reserve_seconds are held back
+        from every source so synthesis still has time to answer.
+        """
+        node = with_config(node)
+        
+        async def run(state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+            if source in (state.get("missing_sources") or []):
+                return {}
+            
+            call = node(state, config)
+            # A resumed run brings a fresh deadline in its config
+            deadline = (config.get("configurable") or {}).get("deadline") or state.get("deadline")
+            if deadline is None:
+                return await call
+            
+            remaining = deadline - self.settings.synthesis_reserve_seconds - time.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                return await asyncio.wait_for(call, timeout=remaining)
+            except asyncio.TimeoutError:
+                call.close()
+                self.logger.warning(f"Dropping {source}: request deadline reached")
+                return {"missing_sources": [source]}
+        
+        return run
+    
+    def _fetch(self, source: str, node: Callable[..., Any]) -> Node:
+        """Wrap a node that fetches a source so it is skipped when a follow-up reuses that source."""
+        node = self._with_deadline(source, node)
+        
+        async def run(state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+            if source in (state.get("reused_sources") or []):
+                return {}
+            return await node(state, config)
+        
+        return run
+    
+    def _add_source_pipelines(self, builder: StateGraph):
+        """Add one search-and-analysis pipeline per source to the graph."""
+        # Bing drops links Google already kept, waiting for Google's search
+        # rather than its pipeline, so Google never waits for Bing
+        builder.add_node("google_pipeline", self._timed("google_pipeline", self._build_pipeline(GooglePipelineOutput, [
+            ("google_search", self._fetch("google", self.search_service.google_search)),
+            ("compact_google_results", self.search_service.compact_google_results),
+            ("analyze_google_results", self._with_deadline("google", self.analysis_service.analyze_google_results)),
+        ])))
+        builder.add_node("bing_pipeline", self._timed("bing_pipeline", self._build_pipeline(BingPipelineOutput, [
+            ("bing_search", self._fetch("bing", self.search_service.bing_search)),
+            ("compact_bing_results", self.search_service.compact_bing_results),
+            ("analyze_bing_results", self._with_deadline("bing", self.analysis_service.analyze_bing_results)),
+        ])))
+        builder.add_node("reddit_pipeline", self._timed("reddit_pipeline", self._build_pipeline(RedditPipelineOutput, [
+            ("reddit_search", self._fetch("reddit", self.search_service.reddit_search)),
+            ("analyze_reddit_posts", self._fetch("reddit", self.analysis_service.analyze_reddit_posts)),
+            ("retrieve_reddit_posts", self._fetch("reddit", self.search_service.retrieve_reddit_posts)),
+            ("analyze_reddit_results", self._with_deadline("reddit", self.analysis_service.analyze_reddit_results)),
+        ])))
     
     def _add_analysis_nodes(self, builder: StateGraph):
         """Add analysis-related nodes to the graph."""
-        builder.add_node("analyze_google_results", self.analysis_service.analyze_google_results)
-        builder.add_node("analyze_bing_results", self.analysis_service.analyze_bing_results)
-        builder.add_node("analyze_reddit_results", self.analysis_service.analyze_reddit_results)
-        builder.add_node("synthesize_analyses", self.analysis_service.synthesize_analyses)
+        builder.add_node("synthesize_analyses", self._timed("synthesize_analyses", self.analysis_service.synthesize_analyses))
+    
+    def _add_session_nodes(self, builder: StateGraph):
+        """Add the nodes that load and store a session's results around each turn."""
+        builder.add_node("plan_followup", self._timed("plan_followup", self.session_service.plan_followup))
+        builder.add_node("save_session", self._timed("save_session", self.session_service.save_session))
     
     def _add_edges(self, builder: StateGraph):
         """Add edges to define the workflow."""
-        # Initial parallel searches
-        builder.add_edge(START, "google_search")
-        builder.add_edge(START, "bing_search")
-        builder.add_edge(START, "reddit_search")
-        
-        # Reddit post analysis and retrieval
-        builder.add_edge("google_search", "analyze_reddit_posts")
-        builder.add_edge("bing_search", "analyze_reddit_posts")
-        builder.add_edge("reddit_search", "analyze_reddit_posts")
-        builder.add_edge("analyze_reddit_posts", "retrieve_reddit_posts")
-        
-        # Parallel result analysis
-        builder.add_edge("retrieve_reddit_posts", "analyze_google_results")
-        builder.add_edge("retrieve_reddit_posts", "analyze_bing_results")
-        builder.add_edge("retrieve_reddit_posts", "analyze_reddit_results")
-        
-        # Final synthesis
-        builder.add_edge("analyze_google_results", "synthesize_analyses")
-        builder.add_edge("analyze_bing_results", "synthesize_analyses")
-        builder.add_edge("analyze_reddit_results", "synthesize_analyses")
-        
-        builder.add_edge("synthesize_analyses", END)
\ No newline at end of file
+        # Each source runs its own search -> analysis chain in parallel, so the
+        # slow Reddit snapshot no longer holds back Google and Bing analysis.
+        # A follow-up turn first decides which sources it can reuse
+        builder.add_edge(START, "plan_followup")
+        for pipeline in SOURCE_PIPELINES:
+            builder.add_edge("plan_followup", pipeline)
+        
+        # Final synthesis waits for every source
+        builder.add_edge(SOURCE_PIPELINES, "synthesize_analyses")
+        
+        builder.add_edge("synthesize_analyses", "save_session")
+        builder.add_edge("save_session", END)
@@ -6,10 +6,29 @@ from typing import Annotated, List, Dict, Any, Optional
 from typing_extensions import TypedDict
 from langgraph.graph.message import add_messages
 
+# State keys holding what each source fetched, which a follow-up turn can reuse
+SOURCE_RESULT_KEYS = {
+    "google": ["google_results"],
+    "bing": ["bing_results"],
+    "reddit": ["reddit_results", "selected_reddit_URLs", "reddit_post_data"],
+}
+
+def merge_unique(existing: Optional[List[str]], new: Optional[List[str]]) -> List[str]:
+    """Reducer that appends values not already present."""
+    merged = list(existing or [])
+    merged.extend(value for value in new or [] if value not in merged)
+    return merged
+
 class ResearchState(TypedDict):
     """State container for the research graph."""
     messages: Annotated[list, add_messages]
     user_question: Optional[str]
+    session_id: Optional[str]
+    previous_turn: Optional[Dict[str, Any]]
+    reused_sources: Optional[List[str]]
+    bypass_llm_cache: Optional[bool]
+    deadline: Optional[float]
+    missing_sources: Annotated[List[str], merge_unique]
     google_results: Optional[str]
     bing_results: Optional[str]
     reddit_results: Optional[str]
@@ -18,4 +37,24 @@ class ResearchState(TypedDict):
     google_analysis: Optional[str]
     bing_analysis: Optional[str]
     reddit_analysis: Optional[str]
-    final_answer: Optional[str]
\ No newline at end of file
+    final_answer: Optional[str]
+
+class GooglePipelineOutput(TypedDict):
+    """State keys written by the Google pipeline."""
+    google_results: Optional[str]
+    google_analysis: Optional[str]
+    missing_sources: Annotated[List[str], merge_unique]
+
+class BingPipelineOutput(TypedDict):
+    """State keys written by the Bing pipeline."""
+    bing_results: Optional[str]
+    bing_analysis: Optional[str]
+    missing_sources: Annotated[List[str], merge_unique]
+
+class RedditPipelineOutput(TypedDict):
+    """State keys written by the Reddit pipeline."""
+    reddit_results: Optional[str]
+    selected_reddit_URLs: Optional[List[str]]
+    reddit_post_data: Optional[List[Dict[str, Any]]]
+    reddit_analysis: Optional[str]
+    missing_sources: Annotated[List[str], merge_unique]
\ No newline at end of file
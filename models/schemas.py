@@ -2,11 +2,17 @@
 Data schemas and models for the research agent.
 """
 
-from typing import List
+from typing import List, Literal
 from pydantic import BaseModel, Field
 
 class RedditURLAnalysis(BaseModel):
     """Schema for Reddit URL analysis results."""
     selected_URLs: List[str] = Field(
         description="List of Reddit URLs that contain valuable information for answering the user's question."
-    )
\ No newline at end of file
+    )
+
+class FollowupPlan(BaseModel):
+    """Schema for deciding which sources a follow-up question needs searched again."""
+    refresh_sources: List[Literal["google", "bing", "reddit"]] = Field(
+        description="Sources whose earlier results do not cover the follow-up question and must be searched again."
+    )
@@ -2,21 +2,155 @@
 Analysis service for processing search results and generating insights.
 """
 
-from typing import Dict, Any, List
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+from config.settings import Settings
 from core.state import ResearchState
-from models.schemas import RedditURLAnalysis
+from models.schemas import FollowupPlan, RedditURLAnalysis
+from services.base_service import BaseService
+from utils.cache import SQLiteCache
+from utils.chunking import chunk_by_tokens
+from utils.metrics import LLM_CACHE_HITS, LLM_LATENCY, LLM_TOKENS
 from utils.prompts import PromptManager
-import streamlit as st
+from utils.rate_limiter import rate_limiter
+from utils.structured_logging import ResearchLogger
+from utils.tokens import estimate_tokens
 
-class AnalysisService:
+def node_name(config: RunnableConfig) -> str:
+    """Name of the graph node a call is made from."""
+    return (config or {}).get("metadata", {}).get("langgraph_node", "unknown")
+
+def model_name(llm) -> str:
+    """Name of the model a chat client calls."""
+    return getattr(llm, "model_name", None) or type(llm).__name__
+
+def render_comment(comment: Dict[str, Any]) -> str:
+    """Render one Reddit comment as a single prompt line."""
+    return f"[{comment.get('post_url') or 'reddit'} | {comment.get('date') or 'unknown date'}] {comment.get('content') or ''}"
+
+class AnalysisService(BaseService):
     """Service for analyzing search results and generating insights."""
     
-    def __init__(self, llm):
+    def __init__(
+        self,
+        settings: Settings,
+        llm,
+        cache: Optional[SQLiteCache] = None,
+        logger: Optional[ResearchLogger] = None,
+        node_llms: Optional[Dict[str, Any]] = None,
+    ):
+        super().__init__(settings)
+        # Nodes without their own client use the default one
         self.llm = llm
+        self.node_llms = node_llms or {}
+        self.cache = cache
         self.prompt_manager = PromptManager()
-        self.logger = st.session_state.get("logger")
+        self.logger = logger
+    
+    def _llm_for(self, config: RunnableConfig):
+        """Chat model assigned to the node a call is made from."""
+        return self.node_llms.get(node_name(config), self.llm)
+    
+    def _cache_key(self, llm, messages: List[Dict[str, str]], schema: Optional[Type[BaseModel]] = None) -> str:
+        """Hash the model name, output schema and prompt messages."""
+        payload = json.dumps({
+            "model": model_name(llm),
+            "schema": schema.__name__ if schema else None,
+            "messages": messages,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _use_cache(self, state: ResearchState) -> bool:
+        """Check whether cached responses may be served for this request."""
+        return bool(self.cache) and not state.get("bypass_llm_cache")
+    
+    async def _call(self, llm, messages: List[Dict[str, str]], invoke: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a model call through the model's process-wide rate limiter."""
+        if not self.settings.llm_rate_limit_enabled:
+            return await invoke()
+        
+        limiter = rate_limiter(model_name(llm), self.settings)
+        # Budget the prompt plus the most the model may write, then settle the real usage
+        tokens = estimate_tokens(json.dumps(messages)) + (getattr(llm, "max_tokens", None) or 0)
+        output = await limiter.call(invoke, tokens)
+        response = output["raw"] if isinstance(output, dict) else output
+        limiter.settle(tokens, (getattr(response, "usage_metadata", None) or {}).get("total_tokens"))
+        return output
+    
+    def _record_usage(self, config: RunnableConfig, response: Any, elapsed: float):
+        """Record latency and token counts of one LLM call."""
+        node = node_name(config)
+        LLM_LATENCY.observe(elapsed, node=node)
+        usage = getattr(response, "usage_metadata", None) or {}
+        for kind in ("input", "output"):
+            if usage.get(f"{kind}_tokens"):
+                LLM_TOKENS.inc(usage[f"{kind}_tokens"], node=node, type=kind)
+    
+    async def _invoke(self, state: ResearchState, messages: List[Dict[str, str]], config: RunnableConfig) -> str:
+        """Invoke the node's LLM, reusing the response to an identical prompt."""
+        llm = self._llm_for(config)
+        key = self._cache_key(llm, messages)
+        if self._use_cache(state):
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                LLM_CACHE_HITS.inc(node=node_name(config))
+                return cached
+        
+        start = time.perf_counter()
+        response = await self._call(llm, messages, lambda: llm.ainvoke(messages, config))
+        self._record_usage(config, response, time.perf_counter() - start)
+        if self.cache:
+            await self.cache.aset(key, response.content)
+        return response.content
     
-    def analyze_reddit_posts(self, state: ResearchState) -> Dict[str, Any]:
+    async def _invoke_structured(
+        self, state: ResearchState, messages: List[Dict[str, str]], schema: Type[BaseModel], config: RunnableConfig
+    ) -> BaseModel:
+        """Invoke the node's LLM with structured output, reusing the response to an identical prompt."""
+        llm = self._llm_for(config)
+        key = self._cache_key(llm, messages, schema)
+        if self._use_cache(state):
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                LLM_CACHE_HITS.inc(node=node_name(config))
+                return schema.model_validate(cached)
+        
+        # include_raw keeps the AIMessage so its token usage can be recorded
+        structured_llm = llm.with_structured_output(schema, include_raw=True)
+        start = time.perf_counter()
+        output = await self._call(llm, messages, lambda: structured_llm.ainvoke(messages, config))
+        self._record_usage(config, output["raw"], time.perf_counter() - start)
+        if output.get("parsing_error"):
+            raise output["parsing_error"]
+        result = output["parsed"]
+        if self.cache:
+            await self.cache.aset(key, result.model_dump())
+        return result
+    
+    async def plan_refresh(
+        self, state: ResearchState, previous_turn: Dict[str, Any], available: List[str], config: RunnableConfig
+    ) -> List[str]:
+        """Ask which of the sources fetched in earlier turns a follow-up question needs searched again."""
+        messages = self.prompt_manager.get_followup_plan_messages(
+            previous_turn.get("questions") or [],
+            state.get("user_question", ""),
+            {source: previous_turn.get(f"{source}_analysis") or "Not available" for source in available},
+        )
+        
+        try:
+            plan = await self._invoke_structured(state, messages, FollowupPlan, config)
+            return [source for source in available if source in plan.refresh_sources]
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Error planning follow-up: {e}")
+            return list(available)
+    
+    async def analyze_reddit_posts(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
         """Analyze Reddit posts to select relevant URLs."""
         if self.logger:
             self.logger.info("🔍 Analyzing Reddit posts for relevant URLs...")
@@ -29,13 +163,12 @@ class AnalysisService:
                 self.logger.info("No Reddit results to analyze")
             return {"selected_reddit_URLs": []}
         
-        structured_llm = self.llm.with_structured_output(RedditURLAnalysis)
         messages = self.prompt_manager.get_reddit_url_analysis_messages(
             user_question, reddit_results
         )
         
         try:
-            analysis = structured_llm.invoke(messages)
+            analysis = await self._invoke_structured(state, messages, RedditURLAnalysis, config)
             selected_urls = analysis.selected_URLs
             
             if self.logger:
@@ -47,7 +180,7 @@ class AnalysisService:
         
         return {"selected_reddit_URLs": selected_urls}
     
-    def analyze_google_results(self, state: ResearchState) -> Dict[str, Any]:
+    async def analyze_google_results(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
         """Analyze Google search results."""
         if self.logger:
             self.logger.info("🌐 Analyzing Google search results...")
@@ -58,14 +191,14 @@ class AnalysisService:
         messages = self.prompt_manager.get_google_analysis_messages(
             user_question, google_results
         )
-        analysis = self.llm.invoke(messages)
+        analysis = await self._invoke(state, messages, config)
         
         if self.logger:
             self.logger.success("Google analysis completed")
         
-        return {"google_analysis": analysis.content}
+        return {"google_analysis": analysis}
     
-    def analyze_bing_results(self, state: ResearchState) -> Dict[str, Any]:
+    async def analyze_bing_results(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
         """Analyze Bing search results."""
         if self.logger:
             self.logger.info("🔍 Analyzing Bing search results...")
@@ -76,14 +209,14 @@ class AnalysisService:
         messages = self.prompt_manager.get_bing_analysis_messages(
             user_question, bing_results
         )
-        analysis = self.llm.invoke(messages)
+        analysis = await self._invoke(state, messages, config)
         
         if self.logger:
             self.logger.success("Bing analysis completed")
         
-        return {"bing_analysis": analysis.content}
+        return {"bing_analysis": analysis}
     
-    def analyze_reddit_results(self, state: ResearchState) -> Dict[str, Any]:
+    async def analyze_reddit_results(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
         """Analyze Reddit search results and post data."""
         if self.logger:
             self.logger.info("🔴 Analyzing Reddit discussions...")
@@ -92,35 +225,67 @@ class AnalysisService:
         reddit_results = state.get("reddit_results", "")
         reddit_post_data = state.get("reddit_post_data", "")
         
+        comments = reddit_post_data.get("comments", []) if isinstance(reddit_post_data, dict) else []
+        if estimate_tokens(str(reddit_post_data)) > self.settings.reddit_single_pass_tokens and comments:
+            # Too many comments for one prompt: summarize batches, then reduce
+            reddit_post_data = await self._summarize_comments(state, user_question, comments, config)
+        
         messages = self.prompt_manager.get_reddit_analysis_messages(
             user_question, reddit_results, reddit_post_data
         )
-        analysis = self.llm.invoke(messages)
+        analysis = await self._invoke(state, messages, config)
         
         if self.logger:
             self.logger.success("Reddit analysis completed")
         
-        return {"reddit_analysis": analysis.content}
+        return {"reddit_analysis": analysis}
     
-    def synthesize_analyses(self, state: ResearchState) -> Dict[str, Any]:
+    async def _summarize_comments(
+        self, state: ResearchState, user_question: str, comments: List[Dict[str, Any]], config: RunnableConfig
+    ) -> str:
+        """Summarize token-bounded batches of comments concurrently."""
+        chunks = chunk_by_tokens(comments, self.settings.reddit_chunk_tokens, render_comment)
+        if self.logger:
+            self.logger.info(f"Summarizing {len(comments)} comments in {len(chunks)} batches")
+        
+        limit = asyncio.Semaphore(self.settings.reddit_map_concurrency)
+        
+        async def summarize(chunk: List[Dict[str, Any]]) -> str:
+            messages = self.prompt_manager.get_reddit_comment_summary_messages(
+                user_question, "\n".join(render_comment(comment) for comment in chunk)
+            )
+            async with limit:
+                return await self._invoke(state, messages, config)
+        
+        summaries = await asyncio.gather(*(summarize(chunk) for chunk in chunks))
+        return "\n\n".join(
+            f"Summary of comment batch {index} of {len(summaries)}:\n{summary}"
+            for index, summary in enumerate(summaries, start=1)
+        )
+    
+    async def synthesize_analyses(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
         """Synthesize all analyses into a final answer."""
         if self.logger:
             self.logger.info("🔄 Synthesizing insights from all sources...")
         
         user_question = state.get("user_question", "")
-        google_analysis = state.get("google_analysis", "")
-        bing_analysis = state.get("bing_analysis", "")
-        reddit_analysis = state.get("reddit_analysis", "")
+        missing_sources = state.get("missing_sources") or []
+        google_analysis = state.get("google_analysis") or "Not available"
+        bing_analysis = state.get("bing_analysis") or "Not available"
+        reddit_analysis = state.get("reddit_analysis") or "Not available"
+        
+        if missing_sources and self.logger:
+            self.logger.warning(f"Synthesizing without: {', '.join(missing_sources)}")
         
         messages = self.prompt_manager.get_synthesis_messages(
-            user_question, google_analysis, bing_analysis, reddit_analysis
+            user_question, google_analysis, bing_analysis, reddit_analysis, missing_sources
         )
-        final_answer = self.llm.invoke(messages)
+        final_answer = await self._invoke(state, messages, config)
         
         if self.logger:
             self.logger.success("Final synthesis completed!")
         
         return {
-            "final_answer": final_answer.content,
-            "messages": [{"role": "assistant", "content": final_answer.content}]
+            "final_answer": final_answer,
+            "messages": [{"role": "assistant", "content": final_answer}]
         }
\ No newline at end of file
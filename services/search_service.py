@@ -2,27 +2,31 @@
 Search service for handling different search engines and Reddit operations.
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from core.state import ResearchState
 from services.base_service import BaseService
-from services.web_operations import WebOperations
-import streamlit as st
+from services.web_operations import WebOperations, rank_posts_for_prefetch
+from utils.http_client import BrightDataClient
+from utils.serp_compaction import compact_engine_results, kept_urls
+from utils.structured_logging import ResearchLogger
 
 class SearchService(BaseService):
     """Service for handling search operations."""
     
-    def __init__(self, settings):
+    def __init__(
+        self, settings, logger: Optional[ResearchLogger] = None, client: Optional[BrightDataClient] = None
+    ):
         super().__init__(settings)
-        self.web_ops = WebOperations(settings)
-        self.logger = st.session_state.get("logger")
+        self.web_ops = WebOperations(settings, client, logger)
+        self.logger = logger
     
-    def google_search(self, state: ResearchState) -> Dict[str, Any]:
+    async def google_search(self, state: ResearchState) -> Dict[str, Any]:
         """Perform Google search."""
         user_question = state.get("user_question", "")
         if self.logger:
             self.logger.info(f"🌐 Searching Google for: {user_question}")
         
-        results = self.web_ops.serp_search(user_question, engine="google")
+        results = await self.web_ops.serp_search(user_question, engine="google")
         
         if results:
             if self.logger:
@@ -33,13 +37,13 @@ class SearchService(BaseService):
         
         return {"google_results": results}
     
-    def bing_search(self, state: ResearchState) -> Dict[str, Any]:
+    async def bing_search(self, state: ResearchState) -> Dict[str, Any]:
         """Perform Bing search."""
         user_question = state.get("user_question", "")
         if self.logger:
             self.logger.info(f"🔍 Searching Bing for: {user_question}")
         
-        results = self.web_ops.serp_search(user_question, engine="bing")
+        results = await self.web_ops.serp_search(user_question, engine="bing")
         
         if results:
             if self.logger:
@@ -50,24 +54,75 @@ class SearchService(BaseService):
         
         return {"bing_results": results}
     
-    def reddit_search(self, state: ResearchState) -> Dict[str, Any]:
+    async def compact_google_results(self, state: ResearchState) -> Dict[str, Any]:
+        """Trim Google results to what the analysis prompt uses."""
+        compacted = compact_engine_results(
+            state.get("google_results"),
+            self.settings.serp_max_results,
+            self.settings.serp_max_snippet_chars,
+            self.settings.serp_prompt_token_budget,
+        )
+        
+        if self.logger and compacted:
+            self.logger.info(f"Compacted Google results to {len(compacted['organic'])} links")
+        
+        return {"google_results": compacted}
+    
+    async def _google_results_for_dedupe(self, state: ResearchState) -> Optional[Dict[str, Any]]:
+        """Google's results compacted as the Google pipeline compacts them, or None if unavailable."""
+        # Reused results are already in the state; otherwise wait for Google's
+        # search, which runs in its own pipeline, without starting another
+        results = state.get("google_results")
+        if results is None:
+            results = await self.web_ops.fetched_serp_results(
+                state.get("user_question", ""), "google", self.settings.serp_dedupe_wait
+            )
+        return compact_engine_results(
+            results,
+            self.settings.serp_max_results,
+            self.settings.serp_max_snippet_chars,
+            self.settings.serp_prompt_token_budget,
+        )
+    
+    async def compact_bing_results(self, state: ResearchState) -> Dict[str, Any]:
+        """Trim Bing results to what the analysis prompt uses, dropping links Google already kept."""
+        compacted = compact_engine_results(
+            state.get("bing_results"),
+            self.settings.serp_max_results,
+            self.settings.serp_max_snippet_chars,
+            self.settings.serp_prompt_token_budget,
+            kept_urls(await self._google_results_for_dedupe(state)),
+        )
+        
+        if self.logger and compacted:
+            self.logger.info(f"Compacted Bing results to {len(compacted['organic'])} unique links")
+        
+        return {"bing_results": compacted}
+    
+    async def reddit_search(self, state: ResearchState) -> Dict[str, Any]:
         """Perform Reddit search."""
         user_question = state.get("user_question", "")
         if self.logger:
             self.logger.info(f"🔴 Searching Reddit for: {user_question}")
         
-        results = self.web_ops.reddit_search_api(user_question)
+        results = await self.web_ops.reddit_search_api(user_question)
         
         if results and results.get("total_found", 0) > 0:
             if self.logger:
                 self.logger.success(f"Found {results.get('total_found')} Reddit posts")
+            
+            # Fetch comments for the likeliest picks while the LLM selects URLs
+            prefetch_urls = rank_posts_for_prefetch(results["parsed_posts"], self.settings.reddit_prefetch_top_k)
+            started = await self.web_ops.prefetch_reddit_comments(prefetch_urls) if prefetch_urls else 0
+            if started and self.logger:
+                self.logger.info(f"Prefetching comments for {started} Reddit posts")
         else:
             if self.logger:
                 self.logger.warning("Reddit search returned no results")
         
         return {"reddit_results": results}
     
-    def retrieve_reddit_posts(self, state: ResearchState) -> Dict[str, Any]:
+    async def retrieve_reddit_posts(self, state: ResearchState) -> Dict[str, Any]:
         """Retrieve detailed Reddit post data."""
         if self.logger:
             self.logger.info("📥 Retrieving Reddit post comments...")
@@ -82,7 +137,7 @@ class SearchService(BaseService):
         if self.logger:
             self.logger.info(f"Processing {len(selected_urls)} Reddit URLs")
         
-        reddit_post_data = self.web_ops.reddit_post_retrieval(selected_urls)
+        reddit_post_data = await self.web_ops.reddit_post_retrieval(selected_urls)
         
         if reddit_post_data and reddit_post_data.get("total_retrieved", 0) > 0:
             if self.logger:
@@ -0,0 +1,75 @@
+"""
+Session service for reusing earlier turns' results in follow-up questions.
+"""
+
+from typing import Any, Dict, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from config.settings import Settings
+from core.state import ResearchState, SOURCE_RESULT_KEYS
+from services.analysis_service import AnalysisService
+from services.base_service import BaseService
+from utils.cache import SQLiteCache
+from utils.structured_logging import ResearchLogger
+
+class SessionService(BaseService):
+    """Keeps what each session fetched so follow-up turns search only what they need."""
+    
+    def __init__(
+        self,
+        settings: Settings,
+        analysis_service: AnalysisService,
+        logger: Optional[ResearchLogger] = None,
+        store: Optional[SQLiteCache] = None,
+    ):
+        super().__init__(settings)
+        self.analysis_service = analysis_service
+        self.logger = logger
+        # Stored next to the other caches so every worker sees every session
+        self.store = store or SQLiteCache(
+            settings.cache_path, "sessions", settings.session_ttl, settings.session_max_entries
+        )
+    
+    async def plan_followup(self, state: ResearchState, config: RunnableConfig) -> Dict[str, Any]:
+        """Load the session's earlier results and restore those the question can reuse."""
+        session_id = state.get("session_id")
+        previous_turn = await self.store.aget(session_id) if session_id else None
+        if not previous_turn:
+            return {"previous_turn": None, "reused_sources": []}
+        
+        available = [
+            source for source, keys in SOURCE_RESULT_KEYS.items()
+            if all(previous_turn.get(key) is not None for key in keys)
+        ]
+        refresh = await self.analysis_service.plan_refresh(state, previous_turn, available, config) if available else []
+        reused = [source for source in available if source not in refresh]
+        
+        if self.logger:
+            if reused:
+                self.logger.info(f"Reusing earlier results from {', '.join(reused)}")
+            if refresh:
+                self.logger.info(f"Searching {', '.join(refresh)} again for the follow-up")
+        
+        update: Dict[str, Any] = {"previous_turn": previous_turn, "reused_sources": reused}
+        for source in reused:
+            update.update({key: previous_turn[key] for key in SOURCE_RESULT_KEYS[source]})
+        return update
+    
+    async def save_session(self, state: ResearchState) -> Dict[str, Any]:
+        """Store this turn's results, keeping earlier ones for sources that missed the deadline."""
+        session_id = state.get("session_id")
+        if not session_id or not state.get("final_answer"):
+            return {}
+        
+        turn = dict(state.get("previous_turn") or {})
+        missing_sources = state.get("missing_sources") or []
+        for source, keys in SOURCE_RESULT_KEYS.items():
+            if source not in missing_sources:
+                turn.update({key: state.get(key) for key in keys + [f"{source}_analysis"]})
+        
+        questions = (turn.get("questions") or []) + [state.get("user_question", "")]
+        turn["questions"] = questions[-self.settings.session_history_turns:]
+        turn["final_answer"] = state["final_answer"]
+        await self.store.aset(session_id, turn)
+        return {}
@@ -2,39 +2,89 @@
 Web operations service for API interactions.
 """
 
-import requests
+import asyncio
+import httpx
 from urllib.parse import quote_plus
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set
 
 from services.base_service import BaseService
+from utils.cache import SQLiteCache, normalize_query
+from utils.http_client import BrightDataClient
 from utils.snapshot_operations import SnapshotOperations
+from utils.structured_logging import ResearchLogger
+from utils.urls import canonicalize_reddit_url
+
+# Snapshot fields read when parsing and routing rows; the rest is dropped on download
+POST_FIELDS = ("title", "url", "description", "num_comments", "num_upvotes", "discovery_input", "input", "keyword", "error")
+COMMENT_FIELDS = ("comment_id", "comment", "date_posted", "post_url", "url", "input", "error")
+
+def serp_key(query: str, engine: str) -> str:
+    """Cache key of one engine's results for a query."""
+    return f"{engine}:{normalize_query(query)}"
+
+def discovery_keyword(record: Dict[str, Any]) -> Optional[str]:
+    """Find the keyword a Reddit discovery row was found for."""
+    discovery_input = record.get("discovery_input") or record.get("input") or {}
+    return discovery_input.get("keyword") or record.get("keyword")
+
+def comment_post(record: Dict[str, Any]) -> Optional[str]:
+    """Find the canonical post URL a Reddit comment row belongs to."""
+    source_url = record.get("post_url") or record.get("url") or (record.get("input") or {}).get("url")
+    return canonicalize_reddit_url(source_url) if source_url else None
+
+def rank_posts_for_prefetch(posts: List[Dict[str, Any]], top_k: int) -> List[str]:
+    """Pick the URLs of the most discussed posts, keeping search order on ties."""
+    ranked = sorted(
+        (post for post in posts if post.get("url") and post.get("num_comments")),
+        key=lambda post: (post["num_comments"], post.get("upvotes") or 0),
+        reverse=True,
+    )
+    return [post["url"] for post in ranked[:top_k]]
 
 class WebOperations(BaseService):
     """Service for web API operations."""
     
-    def __init__(self, settings):
+    def __init__(self, settings, client: Optional[BrightDataClient] = None, logger: Optional[ResearchLogger] = None):
         super().__init__(settings)
-        self.snapshot_ops = SnapshotOperations(settings)
+        self.client = client or BrightDataClient(settings)
+        self.logger = logger
+        self.snapshot_ops = SnapshotOperations(settings, self.client, logger)
+        self.serp_cache = SQLiteCache(
+            settings.cache_path, "serp", settings.serp_cache_ttl, settings.serp_cache_max_entries
+        ) if settings.serp_cache_enabled else None
+        self.comment_cache = SQLiteCache(
+            settings.cache_path, "reddit_comments", settings.comment_cache_ttl, settings.comment_cache_max_entries
+        ) if settings.comment_cache_enabled else None
+        self.reddit_search_cache = SQLiteCache(
+            settings.cache_path, "reddit_search", settings.reddit_search_cache_ttl, settings.reddit_search_cache_max_entries
+        ) if settings.reddit_search_cache_enabled else None
+        # Comment fetches still running, by comment cache key, so later
+        # retrievals of the same post wait for them instead of refetching
+        self._inflight_comments: Dict[str, asyncio.Future] = {}
+        self._background_tasks: Set[asyncio.Task] = set()
     
-    def _make_api_request(self, url: str, **kwargs) -> Optional[Dict[str, Any]]:
+    async def _make_api_request(self, url: str, **kwargs) -> Optional[Dict[str, Any]]:
         """Make authenticated API request to BrightData."""
-        headers = {
-            "Authorization": f"Bearer {self.settings.brightdata_api_key}",
-            "Content-Type": "application/json",
-        }
-        
         try:
-            response = requests.post(url, headers=headers, **kwargs)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"API Request failed: {e}")
+            return await self.client.post_json(url, **kwargs)
+        except httpx.HTTPError as e:
+            if self.logger:
+                self.logger.error(f"API Request failed: {e}", url=url)
             return None
         except Exception as e:
-            print(f"Unknown error: {e}")
+            if self.logger:
+                self.logger.error(f"Unknown error: {e}", url=url)
             return None
     
-    def serp_search(self, query: str, engine: str = "google") -> Optional[Dict[str, Any]]:
+    async def _shared(self, cache: Optional[SQLiteCache], key: str, compute) -> Any:
+        """Compute a result once for every worker on the host, or directly when caching is off."""
+        if cache is None:
+            return await compute()
+        return await cache.get_or_compute(
+            key, compute, self.settings.lease_ttl, self.settings.lease_wait_timeout, self.settings.lease_poll_interval
+        )
+    
+    async def serp_search(self, query: str, engine: str = "google") -> Optional[Dict[str, Any]]:
         """Perform SERP search using specified engine."""
         if engine == "google":
             base_url = "https://www.google.com/search"
@@ -43,23 +93,38 @@ class WebOperations(BaseService):
         else:
             raise ValueError(f"Unknown engine: {engine}")
         
-        api_url = "https://api.brightdata.com/request"
+        api_url = self.client.url("/request")
         payload = {
             "zone": "ai_agent",
             "url": f"{base_url}?q={quote_plus(query)}&brd_json=1",
             "format": "raw"
         }
         
-        full_response = self._make_api_request(api_url, json=payload)
-        if not full_response:
-            return None
+        async def fetch() -> Optional[Dict[str, Any]]:
+            full_response = await self._make_api_request(api_url, json=payload)
+            if not full_response:
+                return None
+            return {
+                "knowledge": full_response.get("knowledge", {}),
+                "organic": full_response.get("organic", [])
+            }
         
-        return {
-            "knowledge": full_response.get("knowledge", {}),
-            "organic": full_response.get("organic", [])
-        }
+        return await self._shared(self.serp_cache, serp_key(query, engine), fetch)
+    
+    async def fetched_serp_results(self, query: str, engine: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Results of a search that is cached or under way here or on another worker, without starting one."""
+        if self.serp_cache is None:
+            return None
+        key = serp_key(query, engine)
+        pending = self.serp_cache.in_flight(key)
+        try:
+            if pending is not None:
+                return await asyncio.wait_for(asyncio.shield(pending), timeout)
+            return await self.serp_cache.wait_for(key, timeout, self.settings.lease_poll_interval)
+        except Exception:
+            return None
     
-    def reddit_search_api(
+    async def reddit_search_api(
         self, 
         keyword: str, 
         date: str = "All time", 
@@ -67,7 +132,7 @@ class WebOperations(BaseService):
         num_of_posts: Optional[int] = None
     ) -> Optional[Dict[str, Any]]:
         """Search Reddit posts by keyword."""
-        trigger_url = "https://api.brightdata.com/datasets/v3/trigger"
+        trigger_url = self.client.url("/datasets/v3/trigger")
         
         params = {
             "dataset_id": self.settings.posts_dataset_id,
@@ -83,71 +148,251 @@ class WebOperations(BaseService):
             "num_of_posts": num_of_posts or self.settings.default_reddit_posts
         }]
         
-        raw_data = self.snapshot_ops.trigger_and_download_snapshot(
-            trigger_url, params, data, "reddit search"
-        )
-        
-        if not raw_data:
-            return None
-        
-        parsed_data = []
-        for post in raw_data:
-            parsed_post = {
-                "title": post.get("title", ""),
-                "url": post.get("url", ""),
-                "description": post.get("description", "")
+        async def fetch() -> Optional[Dict[str, Any]]:
+            parsed_data = []
+            
+            def parse(post: Dict[str, Any]):
+                parsed_data.append({
+                    "title": post.get("title", ""),
+                    "url": post.get("url", ""),
+                    "description": post.get("description", ""),
+                    "num_comments": post.get("num_comments", 0),
+                    "upvotes": post.get("num_upvotes", 0)
+                })
+            
+            summary = await self.snapshot_ops.trigger_batched_snapshot(
+                trigger_url, params, data, "reddit search",
+                input_key=lambda item: item["keyword"], record_key=discovery_keyword, handle=parse, fields=POST_FIELDS,
+            )
+            
+            if not summary or not summary.records:
+                return None
+            
+            return {
+                "parsed_posts": parsed_data, 
+                "total_found": len(parsed_data)
             }
-            parsed_data.append(parsed_post)
         
+        options = data[0]
+        cache_key = f"{normalize_query(keyword)}|{options['date']}|{options['sort_by']}|{options['num_of_posts']}"
+        return await self._shared(self.reddit_search_cache, cache_key, fetch)
+    
+    def _comment_options(
+        self,
+        days_back: Optional[int] = None,
+        load_all_replies: Optional[bool] = None,
+        comment_limit: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Fill in default comment retrieval options."""
         return {
-            "parsed_posts": parsed_data, 
-            "total_found": len(parsed_data)
+            "days_back": days_back or self.settings.default_days_back,
+            "load_all_replies": load_all_replies or self.settings.default_load_all_replies,
+            "comment_limit": comment_limit or self.settings.default_comment_limit
         }
     
-    def reddit_post_retrieval(
+    def _inflight_fetch(self, key: str) -> Optional[asyncio.Future]:
+        """Return the running fetch for a comment cache key on this event loop."""
+        future = self._inflight_comments.get(key)
+        if future is None or future.done() or future.get_loop() is not asyncio.get_running_loop():
+            return None
+        return future
+    
+    async def _cached_comments(self, keys: List[str]) -> Dict[str, Any]:
+        """Look up the cached comments of several posts in one trip off the event loop."""
+        if self.comment_cache is None:
+            return {}
+        return await asyncio.to_thread(lambda: {key: self.comment_cache.get(key) for key in keys})
+    
+    async def prefetch_reddit_comments(self, urls: List[str]) -> int:
+        """Start fetching comments for posts that are neither cached nor in flight."""
+        options = self._comment_options()
+        posts = {canonicalize_reddit_url(url): url for url in urls}
+        cached = await self._cached_comments([self._comment_cache_key(post, options) for post in posts])
+        missing_urls = []
+        for post, url in posts.items():
+            key = self._comment_cache_key(post, options)
+            if self._inflight_fetch(key) is None and cached.get(key) is None:
+                # Posts another worker is already fetching are left to it
+                if self._lease_comments(key):
+                    missing_urls.append(url)
+        
+        if missing_urls:
+            self._start_comment_fetch(missing_urls, options)
+        return len(missing_urls)
+    
+    async def reddit_post_retrieval(
         self, 
         urls: List[str],
         days_back: Optional[int] = None,
         load_all_replies: Optional[bool] = None,
         comment_limit: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
-        """Retrieve Reddit post comments."""
+        """Retrieve Reddit post comments, fetching only posts neither cached nor already in flight."""
         if not urls:
             return None
         
-        trigger_url = "https://api.brightdata.com/datasets/v3/trigger"
+        options = self._comment_options(days_back, load_all_replies, comment_limit)
+        
+        # Serve fresh posts from the cache, join running fetches and collect the rest
+        posts = {canonicalize_reddit_url(url): url for url in urls}
+        cached_by_key = await self._cached_comments([self._comment_cache_key(post, options) for post in posts])
+        comments_by_post = {}
+        pending = {}
+        leased_elsewhere = {}
+        missing_urls = []
+        for post, url in posts.items():
+            key = self._comment_cache_key(post, options)
+            cached = cached_by_key.get(key)
+            future = self._inflight_fetch(key)
+            if cached is not None:
+                comments_by_post[post] = cached
+            elif future is not None:
+                pending[post] = future
+            elif self._lease_comments(key):
+                missing_urls.append(url)
+            else:
+                leased_elsewhere[post] = key
+        
+        fetches = [self._start_comment_fetch(missing_urls, options)] if missing_urls else []
+        
+        # Posts another worker is fetching come from the shared cache once it is done
+        remote = await asyncio.gather(*(
+            self.comment_cache.wait_for(key, self.settings.lease_wait_timeout, self.settings.lease_poll_interval)
+            for key in leased_elsewhere.values()
+        ))
+        
+        # Shielded so a cancelled caller does not cancel a fetch others share
+        failed_urls = []
+        for post, comments in zip(leased_elsewhere, remote):
+            if comments is None:
+                failed_urls.append(posts[post])
+            else:
+                comments_by_post[post] = comments
+        for post, future in pending.items():
+            comments = await asyncio.shield(future)
+            if comments is None:
+                failed_urls.append(posts[post])
+            else:
+                comments_by_post[post] = comments
+        
+        # A failed prefetch is retried as if it had never been started
+        if failed_urls:
+            fetches.append(self._start_comment_fetch(failed_urls, options))
+        
+        results = [await asyncio.shield(fetch) for fetch in fetches]
+        if results and all(result is None for result in results) and not comments_by_post:
+            return None
+        for result in results:
+            comments_by_post.update(result or {})
+        
+        parsed_comments = [
+            comment for comments in comments_by_post.values() for comment in comments
+        ]
+        
+        return {
+            "comments": parsed_comments, 
+            "total_retrieved": len(parsed_comments)
+        }
+    
+    def _comment_cache_key(self, post: str, options: Dict[str, Any]) -> str:
+        """Build the comment cache key for a canonical post URL."""
+        return f"{post}|{options['days_back']}|{options['load_all_replies']}|{options['comment_limit']}"
+    
+    def _lease_comments(self, key: str) -> bool:
+        """Claim a post's comments for this worker; False if another worker is fetching them."""
+        return self.comment_cache is None or self.comment_cache.acquire(key, self.settings.lease_ttl)
+    
+    def _start_comment_fetch(self, urls: List[str], options: Dict[str, Any]) -> asyncio.Task:
+        """Fetch comments in the background and register the fetch for each post."""
+        loop = asyncio.get_running_loop()
+        futures = {}
+        for url in urls:
+            post = canonicalize_reddit_url(url)
+            futures[post] = self._inflight_comments[self._comment_cache_key(post, options)] = loop.create_future()
+        
+        task = asyncio.ensure_future(self._fetch_and_resolve(urls, options, futures))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
+    async def _fetch_and_resolve(
+        self, urls: List[str], options: Dict[str, Any], futures: Dict[str, asyncio.Future]
+    ) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Fetch comments and hand each post's comments to whoever is waiting on it."""
+        fetched = None
+        try:
+            fetched = await self._fetch_reddit_comments(urls, options)
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Reddit comment fetch failed: {e}", posts=len(urls))
+        finally:
+            for post, future in futures.items():
+                key = self._comment_cache_key(post, options)
+                if self._inflight_comments.get(key) is future:
+                    del self._inflight_comments[key]
+                if self.comment_cache:
+                    self.comment_cache.release(key)
+                if not future.done():
+                    future.set_result(None if fetched is None else fetched.get(post, []))
+        return fetched
+    
+    async def _fetch_reddit_comments(
+        self, urls: List[str], options: Dict[str, Any]
+    ) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Trigger a comments snapshot and group the parsed comments by post."""
+        trigger_url = self.client.url("/datasets/v3/trigger")
         
         params = {
             "dataset_id": self.settings.comments_dataset_id,
             "include_errors": "true"
         }
         
-        data = []
-        for url in urls:
-            data.append({
-                "url": url,
-                "days_back": days_back or self.settings.default_days_back,
-                "load_all_replies": load_all_replies or self.settings.default_load_all_replies,
-                "comment_limit": comment_limit or self.settings.default_comment_limit
-            })
-        
-        raw_data = self.snapshot_ops.trigger_and_download_snapshot(
-            trigger_url, params, data, "reddit comments"
-        )
+        data = [{"url": url, **options} for url in urls]
         
-        if not raw_data:
-            return None
+        requested = [canonicalize_reddit_url(url) for url in urls]
+        comments_by_post = {post: [] for post in requested}
+        failed_posts = set()
+        unattributed = []
         
-        parsed_comments = []
-        for comment in raw_data:
+        def parse(comment: Dict[str, Any]):
+            post = comment_post(comment)
+            if post not in comments_by_post and len(requested) == 1:
+                post = requested[0]
+            
+            if comment.get("error"):
+                failed_posts.add(post)
+                return
+            
             parsed_comment = {
                 "comment_id": comment.get("comment_id"),
                 "content": comment.get("comment"),
                 "date": comment.get("date_posted"),
+                "post_url": post,
             }
-            parsed_comments.append(parsed_comment)
+            comments_by_post.get(post, unattributed).append(parsed_comment)
         
-        return {
-            "comments": parsed_comments, 
-            "total_retrieved": len(parsed_comments)
-        }
\ No newline at end of file
+        summary = await self.snapshot_ops.trigger_batched_snapshot(
+            trigger_url, params, data, "reddit comments",
+            input_key=lambda item: canonicalize_reddit_url(item["url"]), record_key=comment_post,
+            handle=parse, fields=COMMENT_FIELDS,
+        )
+        
+        if not summary or not summary.records:
+            return None
+        
+        # Posts cut off at the record limit are returned but not cached, like failed ones
+        if summary.truncated:
+            failed_posts.update(summary.truncated)
+            if self.logger:
+                self.logger.warning(
+                    f"Not caching comments of {len(summary.truncated)} posts cut off at the record limit"
+                )
+        
+        if self.comment_cache:
+            for post in requested:
+                if post not in failed_posts:
+                    await self.comment_cache.aset(self._comment_cache_key(post, options), comments_by_post[post])
+        
+        if unattributed:
+            comments_by_post[""] = unattributed
+        return comments_by_post
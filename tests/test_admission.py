@@ -0,0 +1,31 @@
+"""
+Tests for admission control of research runs.
+"""
+
+import asyncio
+
+from api import research
+from api.admission import AdmissionController
+
+def test_batch_questions_share_the_concurrency_limit(monkeypatch):
+    admission = AdmissionController(max_concurrent=2, max_queue=0, queue_timeout=1, retry_after=1)
+    monkeypatch.setattr(research, "admission", admission)
+    monkeypatch.setattr(research, "answer_cache", None)
+    running = []
+    in_flight = []
+    
+    async def run_research(query):
+        running.append(query)
+        in_flight.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(query)
+        return research.QueryResponse(answer=query.question)
+    
+    monkeypatch.setattr(research, "run_research", run_research)
+    batch = research.BatchQueryRequest(questions=[f"question {index}" for index in range(10)])
+    
+    response = asyncio.run(research.research_batch(batch))
+    
+    assert [result.answer for result in response.results] == batch.questions
+    assert len(in_flight) == 10
+    assert max(in_flight) == 2
@@ -0,0 +1,37 @@
+"""
+Tests for per-node model assignment in the analysis service.
+"""
+
+import asyncio
+from dataclasses import replace
+
+from benchmarks.fake_chat_model import FakeChatModel
+from benchmarks.profiles import ChatProfile
+from config.settings import ModelConfig, Settings
+from services.analysis_service import AnalysisService
+
+def fake_model(name, output_tokens):
+    profile = replace(ChatProfile().scaled(0), output_tokens=output_tokens)
+    return FakeChatModel(profile=profile, model_name=name)
+
+def node_config(node):
+    return {"metadata": {"langgraph_node": node}}
+
+def test_nodes_use_their_assigned_models():
+    small, large = fake_model("small", 1), fake_model("large", 3)
+    service = AnalysisService(Settings(), large, node_llms={"analyze_google_results": small})
+    state = {"user_question": "q", "google_results": "g", "google_analysis": "g", "missing_sources": []}
+    
+    async def run():
+        google = await service.analyze_google_results(state, node_config("analyze_google_results"))
+        final = await service.synthesize_analyses(state, node_config("synthesize_analyses"))
+        return google["google_analysis"], final["final_answer"]
+    
+    assert asyncio.run(run()) == ("token0", "token0 token1 token2")
+
+def test_default_settings_keep_the_large_model_for_synthesis():
+    settings = Settings(model_name="large", fast_model_name="small")
+    
+    assert settings.model_for("synthesize_analyses").model_name == "large"
+    assert settings.model_for("analyze_reddit_posts").model_name == "small"
+    assert settings.model_for("unlisted_node") == ModelConfig("large")
@@ -0,0 +1,25 @@
+"""
+Smoke test for the offline benchmark harness.
+"""
+
+import asyncio
+
+from benchmarks.graph_benchmark import build_graph, percentile, run_benchmark
+from benchmarks.profiles import BrightDataProfile, ChatProfile
+from config.settings import Settings
+
+def test_percentile_interpolates():
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([1.0, 2.0, 3.0, 4.0], 100) == 4.0
+    assert percentile([], 90) == 0.0
+
+def test_benchmark_runs_every_node_offline(tmp_path):
+    settings = Settings(cache_path=str(tmp_path / "cache.sqlite3"), poll_initial_delay=0.01)
+    builder = build_graph(settings, BrightDataProfile().scaled(0), ChatProfile().scaled(0))
+    
+    report = asyncio.run(run_benchmark(builder, requests=3, concurrency=3))
+    
+    assert report["errors"] == 0
+    assert report["end_to_end"]["count"] == 3
+    for node in ["google_search", "reddit_search", "retrieve_reddit_posts", "synthesize_analyses"]:
+        assert report["nodes"][node]["count"] == 3
@@ -0,0 +1,106 @@
+"""
+Tests for the shared cache and its cross-worker leases.
+"""
+
+import asyncio
+
+from utils.cache import SQLiteCache
+
+def worker_cache(path):
+    """A cache object standing in for one worker process."""
+    return SQLiteCache(str(path), "results", ttl=60, max_entries=100)
+
+async def later(call):
+    """Start a call once the first worker has taken the lease."""
+    await asyncio.sleep(0.05)
+    return await call
+
+def test_second_worker_waits_for_the_leaseholder(tmp_path):
+    first, second = worker_cache(tmp_path / "cache.sqlite3"), worker_cache(tmp_path / "cache.sqlite3")
+    calls = []
+    
+    def computation(name):
+        async def compute():
+            calls.append(name)
+            await asyncio.sleep(0.2)
+            return {"computed_by": name}
+        return compute
+    
+    async def run():
+        return await asyncio.gather(
+            first.get_or_compute("question", computation("first"), 10, 5, 0.02),
+            later(second.get_or_compute("question", computation("second"), 10, 5, 0.02)),
+        )
+    
+    results = asyncio.run(run())
+    
+    assert calls == ["first"]
+    assert results == [{"computed_by": "first"}, {"computed_by": "first"}]
+    assert first.stats()["leases"] == 0
+
+def test_lease_outlives_its_ttl_while_computing(tmp_path):
+    first, second = worker_cache(tmp_path / "cache.sqlite3"), worker_cache(tmp_path / "cache.sqlite3")
+    calls = []
+    
+    def computation(name):
+        async def compute():
+            calls.append(name)
+            await asyncio.sleep(0.5)
+            return {"computed_by": name}
+        return compute
+    
+    async def run():
+        leaseholder = asyncio.ensure_future(first.get_or_compute("question", computation("first"), 0.1, 5, 0.02))
+        await asyncio.sleep(0.3)
+        return await asyncio.gather(
+            leaseholder, second.get_or_compute("question", computation("second"), 0.1, 5, 0.02)
+        )
+    
+    results = asyncio.run(run())
+    
+    assert calls == ["first"]
+    assert results == [{"computed_by": "first"}, {"computed_by": "first"}]
+
+def test_failed_leaseholder_hands_over(tmp_path):
+    first, second = worker_cache(tmp_path / "cache.sqlite3"), worker_cache(tmp_path / "cache.sqlite3")
+    
+    async def fail():
+        await asyncio.sleep(0.1)
+        return {"answer": None}
+    
+    async def succeed():
+        return {"answer": "done"}
+    
+    async def run():
+        return await asyncio.gather(
+            first.get_or_compute("question", fail, 10, 5, 0.02, should_store=lambda value: bool(value["answer"])),
+            later(second.get_or_compute("question", succeed, 10, 5, 0.02)),
+        )
+    
+    results = asyncio.run(run())
+    
+    # The unstored result is not shared, so the waiting worker computes its own
+    assert results == [{"answer": None}, {"answer": "done"}]
+    assert first.peek("question") == {"answer": "done"}
+
+def test_expired_lease_can_be_taken_over(tmp_path):
+    first, second = worker_cache(tmp_path / "cache.sqlite3"), worker_cache(tmp_path / "cache.sqlite3")
+    
+    assert first.acquire("question", ttl=0.05)
+    assert not second.acquire("question", ttl=10)
+    asyncio.run(asyncio.sleep(0.1))
+    assert second.acquire("question", ttl=10)
+
+def test_reads_batch_their_lru_updates(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), "results", ttl=60, max_entries=2)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    
+    assert cache.get("first") == 1
+    assert cache.get("missing") is None
+    # The read of "first" reaches the LRU order with the next write
+    cache.set("third", 3)
+    
+    assert cache.peek("first") == 1
+    assert cache.peek("second") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
@@ -0,0 +1,177 @@
+"""
+Tests for the research graph topology.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from config.settings import Settings
+from core.graph_builder import ResearchGraphBuilder
+
+# Seconds each fake node sleeps; the Reddit chain is deliberately the slowest
+NODE_DURATIONS = {
+    "google_search": 0.05,
+    "bing_search": 0.05,
+    "reddit_search": 0.3,
+    "compact_google_results": 0.0,
+    "compact_bing_results": 0.0,
+    "analyze_google_results": 0.05,
+    "analyze_bing_results": 0.05,
+    "analyze_reddit_posts": 0.05,
+    "retrieve_reddit_posts": 0.3,
+    "analyze_reddit_results": 0.05,
+    "synthesize_analyses": 0.01,
+}
+
+NODE_UPDATES = {
+    "google_search": {"google_results": "google"},
+    "bing_search": {"bing_results": "bing"},
+    "reddit_search": {"reddit_results": "reddit"},
+    "compact_google_results": {"google_results": "google"},
+    "compact_bing_results": {"bing_results": "bing"},
+    "analyze_google_results": {"google_analysis": "google analysis"},
+    "analyze_bing_results": {"bing_analysis": "bing analysis"},
+    "analyze_reddit_posts": {"selected_reddit_URLs": []},
+    "retrieve_reddit_posts": {"reddit_post_data": []},
+    "analyze_reddit_results": {"reddit_analysis": "reddit analysis"},
+    "synthesize_analyses": {"final_answer": "answer"},
+}
+
+class NodeRecorder:
+    """Builds fake timed nodes and records when each one starts and ends."""
+    
+    def __init__(self, **durations):
+        self.durations = {**NODE_DURATIONS, **durations}
+        self.started = {}
+        self.finished = {}
+    
+    def node(self, name):
+        async def run(state):
+            self.started[name] = time.perf_counter()
+            await asyncio.sleep(self.durations[name])
+            self.finished[name] = time.perf_counter()
+            return NODE_UPDATES[name]
+        return run
+    
+    def services(self):
+        search_service = SimpleNamespace(**{
+            name: self.node(name)
+            for name in [
+                "google_search", "bing_search", "compact_google_results", "compact_bing_results",
+                "reddit_search", "retrieve_reddit_posts",
+            ]
+        })
+        analysis_service = SimpleNamespace(**{
+            name: self.node(name)
+            for name in NODE_DURATIONS if not hasattr(search_service, name)
+        })
+        return search_service, analysis_service
+
+def run_graph(recorder):
+    search_service, analysis_service = recorder.services()
+    builder = ResearchGraphBuilder(Settings(), search_service, analysis_service)
+    graph = builder.build()
+    return asyncio.run(graph.ainvoke({"user_question": "test question"}))
+
+def test_web_analysis_does_not_wait_for_reddit():
+    recorder = NodeRecorder()
+    run_graph(recorder)
+    
+    # Google and Bing analysis start while Reddit is still searching
+    assert recorder.started["analyze_google_results"] < recorder.finished["reddit_search"]
+    assert recorder.started["analyze_bing_results"] < recorder.finished["reddit_search"]
+    assert recorder.finished["analyze_google_results"] < recorder.started["retrieve_reddit_posts"]
+
+def test_each_engine_is_compacted_before_its_analysis():
+    recorder = NodeRecorder()
+    run_graph(recorder)
+    
+    for engine in ["google", "bing"]:
+        assert recorder.finished[f"{engine}_search"] <= recorder.started[f"compact_{engine}_results"]
+        assert recorder.finished[f"compact_{engine}_results"] <= recorder.started[f"analyze_{engine}_results"]
+
+def test_slow_bing_does_not_hold_back_google_analysis():
+    recorder = NodeRecorder(bing_search=5.0)
+    search_service, analysis_service = recorder.services()
+    graph = ResearchGraphBuilder(Settings(synthesis_reserve_seconds=0.0), search_service, analysis_service).build()
+    
+    final_state = asyncio.run(graph.ainvoke({"user_question": "test question", "deadline": time.time() + 1.0}))
+    
+    assert recorder.finished["analyze_google_results"] < recorder.started["google_search"] + 0.5
+    assert final_state["google_analysis"] == "google analysis"
+    assert final_state["missing_sources"] == ["bing"]
+
+def test_reddit_chain_runs_in_order():
+    recorder = NodeRecorder()
+    run_graph(recorder)
+    
+    chain = ["reddit_search", "analyze_reddit_posts", "retrieve_reddit_posts", "analyze_reddit_results"]
+    for previous, current in zip(chain, chain[1:]):
+        assert recorder.finished[previous] <= recorder.started[current]
+
+def test_synthesis_waits_for_every_source():
+    recorder = NodeRecorder()
+    final_state = run_graph(recorder)
+    
+    start_order = sorted(recorder.started, key=recorder.started.get)
+    assert start_order[-1] == "synthesize_analyses"
+    for node in ["analyze_google_results", "analyze_bing_results", "analyze_reddit_results"]:
+        assert recorder.finished[node] <= recorder.started["synthesize_analyses"]
+    
+    assert final_state["final_answer"] == "answer"
+    assert final_state["google_analysis"] == "google analysis"
+    assert final_state["reddit_analysis"] == "reddit analysis"
+
+def test_critical_path_is_slowest_source():
+    recorder = NodeRecorder()
+    start = time.perf_counter()
+    run_graph(recorder)
+    elapsed = time.perf_counter() - start
+    
+    reddit_chain = sum(NODE_DURATIONS[name] for name in [
+        "reddit_search", "analyze_reddit_posts", "retrieve_reddit_posts", "analyze_reddit_results",
+    ])
+    web_chain = sum(NODE_DURATIONS[name] for name in [
+        "google_search", "compact_google_results", "analyze_google_results",
+    ])
+    assert elapsed < reddit_chain + web_chain + NODE_DURATIONS["synthesize_analyses"]
+
+def test_slow_source_is_dropped_at_deadline():
+    recorder = NodeRecorder()
+    search_service, analysis_service = recorder.services()
+    settings = Settings(synthesis_reserve_seconds=0.0)
+    graph = ResearchGraphBuilder(settings, search_service, analysis_service).build()
+    
+    # Enough time for the web chain but not for the Reddit retrieval
+    final_state = asyncio.run(graph.ainvoke({
+        "user_question": "test question",
+        "deadline": time.time() + 0.5,
+    }))
+    
+    assert final_state["missing_sources"] == ["reddit"]
+    assert final_state["final_answer"] == "answer"
+    assert final_state["google_analysis"] == "google analysis"
+    assert "analyze_reddit_results" not in recorder.started
+    assert "retrieve_reddit_posts" not in recorder.finished
+
+def test_followup_skips_fetching_reused_sources():
+    recorder = NodeRecorder()
+    search_service, analysis_service = recorder.services()
+    
+    async def plan_followup(state, config):
+        return {"reused_sources": ["reddit"], "reddit_results": "earlier reddit", "reddit_post_data": []}
+    
+    async def save_session(state):
+        return {}
+    
+    session_service = SimpleNamespace(plan_followup=plan_followup, save_session=save_session)
+    graph = ResearchGraphBuilder(Settings(), search_service, analysis_service, session_service=session_service).build()
+    final_state = asyncio.run(graph.ainvoke({"user_question": "follow-up", "session_id": "session"}))
+    
+    # Reddit is analyzed again from the earlier results without being fetched
+    for node in ["reddit_search", "analyze_reddit_posts", "retrieve_reddit_posts"]:
+        assert node not in recorder.started
+    assert "analyze_reddit_results" in recorder.finished
+    assert "google_search" in recorder.finished
+    assert final_state["reused_sources"] == ["reddit"]
@@ -0,0 +1,56 @@
+"""
+Tests for the background job queue and its worker pool.
+"""
+
+import asyncio
+
+import pytest
+
+from api.admission import AdmissionRejected
+from api.jobs import JobManager
+from utils.cache import SQLiteCache
+
+async def slow_job(job):
+    await asyncio.sleep(10)
+    return {"answer": job.payload}
+
+def test_full_queue_rejects_and_queued_jobs_cancel():
+    async def run():
+        manager = JobManager(slow_job, workers=1, max_queue=1, result_ttl=60, retry_after=3)
+        manager.start()
+        running = manager.submit("first")
+        await asyncio.sleep(0)
+        queued = manager.submit("second")
+        with pytest.raises(AdmissionRejected):
+            manager.submit("third")
+        
+        assert manager.cancel(queued.id)["status"] == "cancelled"
+        # The cancelled job no longer holds its place in the queue
+        manager.submit("third")
+        assert manager.cancel(running.id)["cancel_requested"]
+        await asyncio.sleep(0.01)
+        assert manager.get(running.id)["status"] == "cancelled"
+        await manager.stop()
+    
+    asyncio.run(run())
+
+def test_another_worker_cancels_through_the_store(tmp_path):
+    def store():
+        return SQLiteCache(str(tmp_path / "cache.sqlite3"), "jobs", ttl=60, max_entries=100)
+    
+    async def run():
+        owner = JobManager(slow_job, workers=1, max_queue=1, result_ttl=60, retry_after=3, store=store())
+        other = JobManager(slow_job, workers=1, max_queue=1, result_ttl=60, retry_after=3, store=store())
+        owner.start()
+        job = owner.submit("question")
+        await asyncio.sleep(0.01)
+        
+        assert other.get(job.id)["status"] == "running"
+        assert other.cancel(job.id)["cancel_requested"]
+        # The owner acts on the request at the job's next progress update
+        owner.update_progress(job, "google_search", "running")
+        await asyncio.sleep(0.01)
+        assert other.get(job.id)["status"] == "cancelled"
+        await owner.stop()
+    
+    asyncio.run(run())
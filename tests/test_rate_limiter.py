@@ -0,0 +1,57 @@
+"""
+Tests for the shared LLM rate limiter.
+"""
+
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+from utils.rate_limiter import RateLimiter
+
+def limiter(requests_per_minute=600, tokens_per_minute=60000, max_retries=3):
+    return RateLimiter("test-model", requests_per_minute, tokens_per_minute, max_retries, 0.01, 0.05)
+
+def rate_limit_error(retry_after):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": str(retry_after)}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+def test_retries_after_the_requested_delay():
+    calls = []
+    
+    async def invoke():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise rate_limit_error(0.2)
+        return "ok"
+    
+    assert asyncio.run(limiter().call(invoke, tokens=10)) == "ok"
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.2
+
+def test_other_errors_are_not_retried():
+    calls = []
+    
+    async def invoke():
+        calls.append(1)
+        raise ValueError("bad prompt")
+    
+    with pytest.raises(ValueError):
+        asyncio.run(limiter().call(invoke, tokens=10))
+    assert len(calls) == 1
+
+def test_token_budget_delays_calls_beyond_it():
+    # 600 tokens per minute refill 10 per second
+    budget = limiter(tokens_per_minute=600)
+    
+    async def run():
+        first = await budget.acquire(600)
+        second = await budget.acquire(3)
+        return first, second
+    
+    first, second = asyncio.run(run())
+    assert first < 0.05
+    assert 0.2 < second < 0.6
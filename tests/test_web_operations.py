@@ -0,0 +1,49 @@
+"""
+Tests for Reddit comment retrieval against the BrightData stand-in.
+"""
+
+import asyncio
+from dataclasses import replace
+
+import httpx
+
+from benchmarks.fake_brightdata import create_app
+from benchmarks.profiles import BrightDataProfile
+from config.settings import Settings
+from services.web_operations import WebOperations
+from utils.http_client import BrightDataClient
+from utils.snapshot_batcher import trigger_batch_window
+
+POSTS = [
+    "https://www.reddit.com/r/test/comments/aaaaaaa/",
+    "https://www.reddit.com/r/test/comments/bbbbbbb/",
+]
+
+def fetch_comments(tmp_path, max_records: int):
+    settings = Settings(
+        cache_path=str(tmp_path / f"cache{max_records}.sqlite3"), poll_initial_delay=0.01, snapshot_max_records=max_records
+    )
+    profile = replace(BrightDataProfile().scaled(0), comments_per_post=5)
+    client = BrightDataClient(settings, transport=httpx.ASGITransport(app=create_app(profile)))
+    web_ops = WebOperations(settings, client)
+    options = web_ops._comment_options()
+    
+    async def run():
+        trigger_batch_window.set(0.01)
+        return await web_ops._fetch_reddit_comments(POSTS, options)
+    
+    comments = asyncio.run(run())
+    cached = [web_ops.comment_cache.get(web_ops._comment_cache_key(post, options)) for post in POSTS]
+    return comments, cached
+
+def test_record_limit_applies_per_post(tmp_path):
+    comments, cached = fetch_comments(tmp_path, max_records=5)
+    
+    assert [len(comments[post]) for post in POSTS] == [5, 5]
+    assert [len(entry) for entry in cached] == [5, 5]
+
+def test_truncated_posts_are_not_cached(tmp_path):
+    comments, cached = fetch_comments(tmp_path, max_records=3)
+    
+    assert [len(comments[post]) for post in POSTS] == [3, 3]
+    assert cached == [None, None]
@@ -2,10 +2,12 @@
 Streamlit chat interface component.
 """
 
+import asyncio
 import streamlit as st
 import threading
 from typing import Dict, Any
 from datetime import datetime
+from uuid import uuid4
 
 from core.state import ResearchState
 from utils.logger import StreamlitLogger
@@ -16,6 +18,9 @@ class ChatInterface:
     def __init__(self, graph, logger: StreamlitLogger):
         self.graph = graph
         self.logger = logger
+        # Follow-up questions in one browser session reuse earlier results
+        if "session_id" not in st.session_state:
+            st.session_state.session_id = uuid4().hex
     
     def render(self):
         """Render the chat interface."""
@@ -67,10 +72,10 @@ class ChatInterface:
         })
         st.session_state.is_researching = True
 
-        # Synchronous call — just like CLI
+        # Blocking call — just like CLI
         try:
             initial_state = self._create_initial_state(user_input)
-            final_state = self.graph.invoke(initial_state)
+            final_state = asyncio.run(self.graph.ainvoke(initial_state))
 
             # Remove researching status
             st.session_state.messages = [
@@ -108,7 +113,7 @@ class ChatInterface:
             self.logger.info("Launching parallel searches across Google, Bing, and Reddit...")
             
             # Execute the research graph
-            final_state = self.graph.invoke(initial_state)
+            final_state = asyncio.run(self.graph.ainvoke(initial_state))
             
             # Remove the "researching" status message
             st.session_state.messages = [msg for msg in st.session_state.messages 
@@ -157,6 +162,7 @@ class ChatInterface:
         return {
             "messages": [{"role": "user", "content": user_input}],
             "user_question": user_input,
+            "session_id": st.session_state.session_id,
             "google_results": None,
             "bing_results": None,
             "reddit_results": None,
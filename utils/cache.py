@@ -0,0 +1,356 @@
+"""
+Disk-backed TTL cache shared by every worker process on the host.
+"""
+
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from utils.single_flight import SingleFlight
+
+# Seconds between writes of recorded read times to the LRU order
+TOUCH_FLUSH_INTERVAL = 30.0
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so near-identical questions share a cache key."""
+    query = re.sub(r"\s+", " ", query.casefold()).strip()
+    return query.rstrip("?!.").strip()
+
+class SQLiteCache:
+    """TTL cache with LRU eviction, stored in SQLite, and per-process hit/miss counters.
+    
+    Several caches can share one database file by using different namespaces.
+    The database runs in WAL mode so uvicorn workers on the same host can
+    read concurrently while writes are serialized by SQLite itself. Reads
+    never take the write lock: read times are collected in memory and
+    written to the LRU order in batches. Leases mark keys whose value some
+    worker is computing, so the others can wait for it instead of repeating
+    the work. Coroutines use the a-prefixed methods, which run SQLite in a
+    worker thread.
+    """
+    
+    def __init__(self, path: str, namespace: str, ttl: float, max_entries: int):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        # Read times not yet written to the LRU order, by key
+        self._touched: Dict[str, float] = {}
+        self._flushed_at = time.monotonic()
+        # Concurrent computations on one event loop are collapsed before any lease is taken
+        self._flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SingleFlight]" = weakref.WeakKeyDictionary()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database once per process and create the schema."""
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_entries_lru ON cache_entries (namespace, accessed_at)"
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache_leases (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._conn = conn
+        self._pid = os.getpid()
+        return conn
+    
+    @property
+    def owner(self) -> str:
+        """Identifies the leases held by this cache object in this process."""
+        return f"{os.getpid()}:{id(self)}"
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            
+            # Expired entries are purged by the next write
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self._touched[key] = now
+            if time.monotonic() - self._flushed_at >= TOUCH_FLUSH_INTERVAL:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._flush_touched(conn)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+        return json.loads(row[0])
+    
+    def _flush_touched(self, conn: sqlite3.Connection):
+        """Write the collected read times to the LRU order within the caller's transaction."""
+        conn.executemany(
+            "UPDATE cache_entries SET accessed_at = MAX(accessed_at, ?) WHERE namespace = ? AND key = ?",
+            [(accessed_at, self.namespace, key) for key, accessed_at in self._touched.items()],
+        )
+        self._touched.clear()
+        self._flushed_at = time.monotonic()
+    
+    def peek(self, key: str) -> Optional[Any]:
+        """Return a fresh value without touching the LRU order or the counters."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+    
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value and evict least recently used entries."""
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    """INSERT OR REPLACE INTO cache_entries
+                       (namespace, key, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)""",
+                    (self.namespace, key, payload, now, now),
+                )
+                # Eviction must see what was read since the last write
+                self._flush_touched(conn)
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+                    (self.namespace, now - self.ttl),
+                )
+                (count,) = conn.execute(
+                    "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+                ).fetchone()
+                if count > self.max_entries:
+                    conn.execute(
+                        """DELETE FROM cache_entries WHERE rowid IN (
+                               SELECT rowid FROM cache_entries WHERE namespace = ?
+                               ORDER BY accessed_at LIMIT ?)""",
+                        (self.namespace, count - self.max_entries),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def acquire(self, key: str, ttl: float) -> bool:
+        """Take the lease on a key unless another owner holds one that has not expired."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT owner, expires_at FROM cache_leases WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                acquired = row is None or row[0] == self.owner or row[1] <= now
+                if acquired:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache_leases (namespace, key, owner, expires_at) VALUES (?, ?, ?, ?)",
+                        (self.namespace, key, self.owner, now + ttl),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return acquired
+    
+    def release(self, key: str):
+        """Drop the lease on a key if this owner holds it."""
+        with self._lock:
+            self._connect().execute(
+                "DELETE FROM cache_leases WHERE namespace = ? AND key = ? AND owner = ?",
+                (self.namespace, key, self.owner),
+            )
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """get without blocking the event loop."""
+        return await asyncio.to_thread(self.get, key)
+    
+    async def apeek(self, key: str) -> Optional[Any]:
+        """peek without blocking the event loop."""
+        return await asyncio.to_thread(self.peek, key)
+    
+    async def aset(self, key: str, value: Any):
+        """set without blocking the event loop."""
+        await asyncio.to_thread(self.set, key, value)
+    
+    async def aacquire(self, key: str, ttl: float) -> bool:
+        """acquire without blocking the event loop."""
+        return await asyncio.to_thread(self.acquire, key, ttl)
+    
+    async def arelease(self, key: str):
+        """release without blocking the event loop."""
+        await asyncio.to_thread(self.release, key)
+    
+    @asynccontextmanager
+    async def renewing(self, key: str, ttl: float) -> AsyncIterator[None]:
+        """Keep extending a held lease while the block runs, so long work never outlives it."""
+        async def renew():
+            while True:
+                await asyncio.sleep(ttl / 3)
+                await self.aacquire(key, ttl)
+        
+        task = asyncio.ensure_future(renew())
+        try:
+            yield
+        finally:
+            task.cancel()
+    
+    def leased(self, key: str) -> bool:
+        """Whether any owner holds an unexpired lease on a key."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT 1 FROM cache_leases WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, time.time()),
+            ).fetchone()
+        return row is not None
+    
+    def in_flight(self, key: str) -> Optional[asyncio.Future]:
+        """The computation of a key running on this event loop, if any."""
+        flights = self._flights.get(asyncio.get_running_loop())
+        return flights.pending(key) if flights else None
+    
+    async def wait_for(self, key: str, timeout: float, poll_interval: float) -> Optional[Any]:
+        """Wait for the leaseholder's value; None once the lease is gone without one or on timeout."""
+        give_up = time.monotonic() + timeout
+        while True:
+            value = await self.apeek(key)
+            if value is not None or not await asyncio.to_thread(self.leased, key) or time.monotonic() >= give_up:
+                return value
+            await asyncio.sleep(poll_interval)
+    
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        lease_ttl: float,
+        wait_timeout: float,
+        poll_interval: float,
+        should_store: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """Return the cached value, or compute it once for every worker on the host.
+        
+        While another worker holds the lease, its result is awaited instead of
+        recomputed; the holder renews the lease for as long as it computes. If
+        it gives up without one, or the wait times out, the value is computed
+        here. Results failing should_store are returned but not cached.
+        """
+        flights = self._flights.setdefault(asyncio.get_running_loop(), SingleFlight())
+        return await flights.do(
+            key, lambda: self._get_or_compute(key, compute, lease_ttl, wait_timeout, poll_interval, should_store)
+        )
+    
+    async def _get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        lease_ttl: float,
+        wait_timeout: float,
+        poll_interval: float,
+        should_store: Optional[Callable[[Any], bool]],
+    ) -> Any:
+        """Look up, wait for or compute a value, holding the lease while computing."""
+        value = await self.aget(key)
+        if value is not None:
+            return value
+        
+        give_up = time.monotonic() + wait_timeout
+        leased = await self.aacquire(key, lease_ttl)
+        while not leased and time.monotonic() < give_up:
+            value = await self.wait_for(key, give_up - time.monotonic(), poll_interval)
+            if value is not None:
+                return value
+            leased = await self.aacquire(key, lease_ttl)
+        
+        try:
+            # The previous leaseholder may have finished just before the lease was taken
+            value = await self.apeek(key) if leased else None
+            if value is not None:
+                return value
+            if leased:
+                async with self.renewing(key, lease_ttl):
+                    value = await compute()
+            else:
+                value = await compute()
+            if value is not None and (should_store is None or should_store(value)):
+                await self.aset(key, value)
+            return value
+        finally:
+            if leased:
+                await self.arelease(key)
+    
+    def clear(self):
+        """Remove every entry and lease for this namespace and reset the counters."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            conn.execute("DELETE FROM cache_leases WHERE namespace = ?", (self.namespace,))
+            self.hits = self.misses = 0
+            self._touched.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return this process's hit/miss counters, the current entry count and the live leases."""
+        with self._lock:
+            conn = self._connect()
+            hits, misses = self.hits, self.misses
+            (entries,) = conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+            (leases,) = conn.execute(
+                "SELECT COUNT(*) FROM cache_leases WHERE namespace = ? AND expires_at > ?",
+                (self.namespace, time.time()),
+            ).fetchone()
+        
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "entries": entries,
+            "leases": leases,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,46 @@
+"""
+Persistent graph checkpoints so failed or interrupted research runs can resume.
+"""
+
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+@asynccontextmanager
+async def open_checkpointer(path: str) -> AsyncIterator[BaseCheckpointSaver]:
+    """Open the SQLite checkpoint store shared by every worker on the host."""
+    # Imported here so only processes that checkpoint pay for aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    async with AsyncSqliteSaver.from_conn_string(path) as saver:
+        await saver.setup()
+        yield saver
+
+def run_config(run_id: str, deadline: Optional[float] = None) -> RunnableConfig:
+    """Config that checkpoints a run under its ID, optionally overriding its deadline."""
+    configurable = {"thread_id": run_id}
+    if deadline is not None:
+        configurable["deadline"] = deadline
+    return {"configurable": configurable}
+
+async def prune_checkpoints(saver: BaseCheckpointSaver, max_age: float) -> int:
+    """Delete runs whose latest checkpoint is older than max_age seconds."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=max_age)
+    latest: Dict[str, datetime] = {}
+    async for item in saver.alist(None):
+        thread_id = item.config["configurable"]["thread_id"]
+        saved_at = datetime.fromisoformat(item.checkpoint["ts"])
+        latest[thread_id] = max(latest.get(thread_id, saved_at), saved_at)
+    
+    stale = [thread_id for thread_id, saved_at in latest.items() if saved_at < cutoff]
+    for thread_id in stale:
+        await saver.adelete_thread(thread_id)
+    return len(stale)
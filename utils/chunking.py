@@ -0,0 +1,28 @@
+"""
+Token-aware chunking of items for map-reduce prompts.
+"""
+
+from typing import Callable, List, TypeVar
+
+from utils.tokens import estimate_tokens
+
+T = TypeVar("T")
+
+def chunk_by_tokens(items: List[T], max_tokens: int, render: Callable[[T], str] = str) -> List[List[T]]:
+    """Split items into consecutive chunks whose rendered size fits max_tokens.
+    
+    An item that alone exceeds max_tokens becomes a chunk of its own.
+    """
+    chunks: List[List[T]] = []
+    current: List[T] = []
+    current_tokens = 0
+    for item in items:
+        tokens = estimate_tokens(render(item))
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        chunks.append(current)
+    return chunks
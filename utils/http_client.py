@@ -0,0 +1,121 @@
+"""
+Async HTTP client for BrightData API calls.
+"""
+
+import asyncio
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from config.settings import Settings
+from utils.metrics import BRIGHTDATA_ERRORS, BRIGHTDATA_LATENCY, endpoint_label
+
+class BrightDataClient:
+    """Shared keep-alive HTTP client with per-host concurrency limits.
+    
+    Connections cannot be shared across event loops (e.g. one asyncio.run
+    per CLI question), so each loop gets its own pool and limits.
+    """
+    
+    def __init__(self, settings: Settings, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.settings = settings
+        self.transport = transport
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._host_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+    
+    def url(self, path: str) -> str:
+        """Build an absolute BrightData API URL."""
+        return f"{self.settings.brightdata_base_url.rstrip('/')}/{path.lstrip('/')}"
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled client bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        # A finished loop's pool cannot be closed from this one; dropping it
+        # lets its sockets be closed as it is collected
+        for finished in [other for other in self._clients if other.is_closed()]:
+            del self._clients[finished]
+            self._host_limits.pop(finished, None)
+        
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = httpx.AsyncClient(
+                headers={"Authorization": f"Bearer {self.settings.brightdata_api_key}"},
+                timeout=httpx.Timeout(
+                    self.settings.http_timeout,
+                    connect=self.settings.http_connect_timeout,
+                ),
+                limits=httpx.Limits(
+                    max_connections=self.settings.http_max_connections,
+                    max_keepalive_connections=self.settings.http_max_keepalive_connections,
+                ),
+                transport=self.transport,
+            )
+            self._host_limits[loop] = {}
+        return client
+    
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Get the concurrency limit for the host of a URL."""
+        host = urlsplit(url).netloc
+        limits = self._host_limits.setdefault(asyncio.get_running_loop(), {})
+        if host not in limits:
+            limits[host] = asyncio.Semaphore(self.settings.http_max_connections_per_host)
+        return limits[host]
+    
+    @contextmanager
+    def _instrument(self, method: str, url: str) -> Iterator[None]:
+        """Record the latency and any failure of one request."""
+        labels = {"method": method, "endpoint": endpoint_label(url)}
+        start = time.perf_counter()
+        try:
+            yield
+        except httpx.HTTPStatusError as e:
+            BRIGHTDATA_ERRORS.inc(reason=str(e.response.status_code), **labels)
+            raise
+        except httpx.HTTPError as e:
+            BRIGHTDATA_ERRORS.inc(reason=type(e).__name__, **labels)
+            raise
+        finally:
+            BRIGHTDATA_LATENCY.observe(time.perf_counter() - start, **labels)
+    
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the shared pool and raise on HTTP errors."""
+        client = self._get_client()
+        async with self._host_limit(url):
+            with self._instrument(method, url):
+                response = await client.request(method, url, **kwargs)
+                response.raise_for_status()
+        return response
+    
+    async def stream_lines(self, method: str, url: str, **kwargs) -> AsyncIterator[str]:
+        """Stream a response body line by line without buffering it."""
+        client = self._get_client()
+        async with self._host_limit(url):
+            with self._instrument(method, url):
+                async with client.stream(method, url, **kwargs) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        yield line
+    
+    async def get_json(self, url: str, **kwargs) -> Any:
+        """Send a GET request and decode the JSON body."""
+        response = await self.request("GET", url, **kwargs)
+        return response.json()
+    
+    async def post_json(self, url: str, **kwargs) -> Any:
+        """Send a POST request and decode the JSON body."""
+        response = await self.request("POST", url, **kwargs)
+        return response.json()
+    
+    async def aclose(self):
+        """Close the pooled connections of the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.pop(loop, None)
+        self._host_limits.pop(loop, None)
+        if client is not None and not client.is_closed:
+            await client.aclose()
@@ -3,10 +3,13 @@ Streamlit-compatible logging utility.
 """
 
 import streamlit as st
+from collections import deque
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any
 from enum import Enum
 
+from utils.structured_logging import LogEntry, ResearchLogger
+
 class LogLevel(Enum):
     """Log levels for the Streamlit logger."""
     INFO = "INFO"
@@ -19,34 +22,46 @@ class StreamlitLogger:
     
     def __init__(self, max_logs: int = 100):
         self.max_logs = max_logs
+        # Filled from the logging thread; drained into session state on the script thread
+        self._inbox: deque = deque()
         if "logs" not in st.session_state:
-            st.session_state.logs = []
+            st.session_state.logs = deque(maxlen=max_logs)
+    
+    def subscribe(self, logger: ResearchLogger) -> Callable[[], None]:
+        """Show entries from the structured logger; returns a function that unsubscribes."""
+        return logger.subscribe(self._inbox.append)
     
     @property
     def logs(self) -> List[Dict[str, Any]]:
         """Get current logs from session state."""
-        return st.session_state.get("logs", [])
+        while self._inbox:
+            self._add_entry(self._inbox.popleft())
+        return list(st.session_state.get("logs", []))
+    
+    def _add_entry(self, entry: LogEntry):
+        """Add an entry received from the structured logger."""
+        full_timestamp = datetime.fromtimestamp(entry["timestamp"])
+        self._append({
+            "timestamp": full_timestamp.strftime("%H:%M:%S"),
+            "level": entry["level"] if entry["level"] in LogLevel.__members__ else LogLevel.INFO.value,
+            "message": entry["message"],
+            "full_timestamp": full_timestamp
+        })
+    
+    def _append(self, log_entry: Dict[str, Any]):
+        """Append to the bounded session state log, dropping the oldest entry when full."""
+        if "logs" not in st.session_state:
+            st.session_state.logs = deque(maxlen=self.max_logs)
+        st.session_state.logs.append(log_entry)
     
     def _add_log(self, level: LogLevel, message: str):
         """Add a log entry."""
-        log_entry = {
+        self._append({
             "timestamp": datetime.now().strftime("%H:%M:%S"),
             "level": level.value,
             "message": message,
             "full_timestamp": datetime.now()
-        }
-        
-        # Add to session state logs
-        if "logs" not in st.session_state:
-            st.session_state.logs = []
-        
-        st.session_state.logs.append(log_entry)
-        # st.session_state.logs = st.session_state.logs  # triggers state update
-        # st.experimental_rerun()  # force UI refresh]
-        
-        # Keep only the most recent logs
-        if len(st.session_state.logs) > self.max_logs:
-            st.session_state.logs = st.session_state.logs[-self.max_logs:]
+        })
     
     def info(self, message: str):
         """Log an info message."""
@@ -70,7 +85,7 @@ class StreamlitLogger:
     
     def clear_logs(self):
         """Clear all logs."""
-        st.session_state.logs = []
+        st.session_state.logs = deque(maxlen=self.max_logs)
     
     def render_logs(self):
         """Render the logs in the Streamlit interface."""
@@ -0,0 +1,247 @@
+"""
+In-process metrics with Prometheus text exposition.
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers cached lookups up to multi-minute snapshot waits
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+POLL_ATTEMPT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a label set as {name="value",...}."""
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_value(value: float) -> str:
+    """Render a sample value, keeping integers free of a trailing .0."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def endpoint_label(url: str) -> str:
+    """Reduce a BrightData URL to its endpoint, dropping snapshot ids."""
+    path = urlsplit(url).path or "/"
+    return re.sub(r"/(progress|snapshot)/[^/]+$", r"/\1", path)
+
+class Metric:
+    """Base class holding the name, help text and label names of a metric."""
+    
+    type_name = "untyped"
+    
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        """Order label values by the metric's label names."""
+        return tuple(str(labels[name]) for name in self.label_names)
+    
+    def samples(self) -> List[str]:
+        """Render the metric's sample lines."""
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        """Render the metric with its HELP and TYPE lines."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        return "\n".join(lines + self.samples())
+
+class Counter(Metric):
+    """Monotonically increasing count per label set."""
+    
+    type_name = "counter"
+    
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, amount: float = 1, **labels: str):
+        """Add to the count for a label set."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels: str) -> float:
+        """Current count for a label set."""
+        return self._values.get(self._key(labels), 0)
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}" for key, value in values]
+
+class Gauge(Metric):
+    """Point-in-time values read from a callback when metrics are scraped."""
+    
+    type_name = "gauge"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        collect: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._collectors: List[Callable[[], Dict[LabelValues, float]]] = [collect] if collect else []
+    
+    def set(self, value: float, **labels: str):
+        """Set the value for a label set."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+    
+    def add_collector(self, collect: Callable[[], Dict[LabelValues, float]]):
+        """Read extra values from a callback at scrape time."""
+        self._collectors.append(collect)
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        for collect in self._collectors:
+            values.update(collect())
+        return [
+            f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+class Histogram(Metric):
+    """Cumulative bucket counts, sum and count per label set."""
+    
+    type_name = "histogram"
+    
+    def __init__(
+        self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+    
+    def observe(self, value: float, **labels: str):
+        """Record one observation."""
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+    
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall time spent inside the block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def count(self, **labels: str) -> int:
+        """Number of observations for a label set."""
+        counts = self._counts.get(self._key(labels))
+        return counts[-1] if counts else 0
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        lines = []
+        for key, counts, total in series:
+            bounds = [format_value(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, counts):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.label_names, key, le)} {count}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, key)} {counts[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for a scrape."""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric, returning the existing one if the name is taken."""
+        return self._metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        """Create or fetch a counter."""
+        return self.register(Counter(name, documentation, label_names))
+    
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        """Create or fetch a gauge."""
+        return self.register(Gauge(name, documentation, label_names))
+    
+    def histogram(
+        self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        """Create or fetch a histogram."""
+        return self.register(Histogram(name, documentation, label_names, buckets))
+    
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+registry = MetricsRegistry()
+
+NODE_LATENCY = registry.histogram(
+    "epistemo_node_duration_seconds", "Time spent in each research graph node.", ["node"]
+)
+SNAPSHOT_POLLS = registry.counter(
+    "epistemo_snapshot_polls_total", "Snapshot progress checks by reported status.", ["status"]
+)
+SNAPSHOT_POLL_ATTEMPTS = registry.histogram(
+    "epistemo_snapshot_poll_attempts", "Progress checks needed per snapshot, by outcome.", ["outcome"],
+    buckets=POLL_ATTEMPT_BUCKETS,
+)
+BRIGHTDATA_LATENCY = registry.histogram(
+    "epistemo_brightdata_request_duration_seconds", "BrightData API request latency.", ["method", "endpoint"]
+)
+BRIGHTDATA_ERRORS = registry.counter(
+    "epistemo_brightdata_request_errors_total", "Failed BrightData API requests.", ["method", "endpoint", "reason"]
+)
+LLM_LATENCY = registry.histogram(
+    "epistemo_llm_call_duration_seconds", "LLM call latency by graph node, excluding cache hits.", ["node"]
+)
+LLM_TOKENS = registry.counter(
+    "epistemo_llm_tokens_total", "LLM tokens used by graph node.", ["node", "type"]
+)
+LLM_QUEUE_WAIT = registry.histogram(
+    "epistemo_llm_rate_limit_wait_seconds", "Time LLM calls waited for the rate limiter, by model.", ["model"]
+)
+LLM_RATE_LIMIT_WAITING = registry.gauge(
+    "epistemo_llm_rate_limit_waiting", "LLM calls waiting for the rate limiter, by model.", ["model"]
+)
+LLM_RATE_LIMIT_BUDGET = registry.gauge(
+    "epistemo_llm_rate_limit_available", "Requests and tokens left in each model's per-minute budget.", ["model", "budget"]
+)
+LLM_RETRIES = registry.counter(
+    "epistemo_llm_retries_total", "LLM calls retried after a rate limit or server error.", ["model", "status"]
+)
+LLM_CACHE_HITS = registry.counter(
+    "epistemo_llm_cache_hits_total", "LLM calls served from the response cache by graph node.", ["node"]
+)
+CACHE_HIT_RATIO = registry.gauge(
+    "epistemo_cache_hit_ratio", "Hit ratio of each persistent cache.", ["namespace"]
+)
+CACHE_ENTRIES = registry.gauge(
+    "epistemo_cache_entries", "Entries stored in each persistent cache.", ["namespace"]
+)
+CACHE_LEASES = registry.gauge(
+    "epistemo_cache_leases", "Keys some worker is currently computing, per persistent cache.", ["namespace"]
+)
@@ -99,6 +99,29 @@ Detailed Reddit Post Data: {reddit_post_data}
 
 Please analyze this Reddit content and extract community insights, user experiences, and relevant discussions."""
     
+    @staticmethod
+    def reddit_comment_summary_system() -> str:
+        """System prompt for summarizing one batch of Reddit comments."""
+        return """You are an expert at analyzing social media discussions. Summarize the provided batch of Reddit comments for a researcher answering the user's question.
+
+Focus on:
+- Real user experiences, recommendations and warnings
+- Points of agreement and disagreement between commenters
+- Concrete details such as products, numbers, prices and dates
+- Short verbatim quotes worth citing (use quotation marks and keep the post URL)
+
+Ignore comments that are off-topic for the question. Be concise; your summary will be merged with summaries of other batches."""
+    
+    @staticmethod
+    def reddit_comment_summary_user(user_question: str, comments: str) -> str:
+        """User prompt for summarizing one batch of Reddit comments."""
+        return f"""Question: {user_question}
+
+Reddit Comments:
+{comments}
+
+Please summarize what these comments contribute to answering the question."""
+    
     @staticmethod
     def synthesis_system() -> str:
         """System prompt for synthesizing all analyses."""
@@ -115,8 +138,16 @@ Your task:
 Create a comprehensive answer that addresses the user's question from multiple angles."""
     
     @staticmethod
-    def synthesis_user(user_question: str, google_analysis: str, bing_analysis: str, reddit_analysis: str) -> str:
+    def synthesis_user(
+        user_question: str, google_analysis: str, bing_analysis: str, reddit_analysis: str, missing_sources: List[str]
+    ) -> str:
         """User prompt for synthesizing all analyses."""
+        missing_note = ""
+        if missing_sources:
+            missing_note = f"""
+
+Note: {", ".join(missing_sources)} did not respond in time. Answer from the remaining sources and say which sources were unavailable."""
+        
         return f"""Question: {user_question}
 
 Google Analysis: {google_analysis}
@@ -125,7 +156,33 @@ Bing Analysis: {bing_analysis}
 
 Reddit Community Analysis: {reddit_analysis}
 
-Please synthesize these analyses into a comprehensive answer that addresses the question from multiple perspectives."""
+Please synthesize these analyses into a comprehensive answer that addresses the question from multiple perspectives.{missing_note}"""
+    
+    @staticmethod
+    def followup_plan_system() -> str:
+        """System prompt for deciding which sources a follow-up question needs."""
+        return """You are planning research for a follow-up question in an ongoing conversation. Earlier turns already searched Google, Bing, and Reddit, and their analyses are shown below.
+
+Decide which sources must be searched again:
+- Refresh a source when the follow-up asks about a different topic, entity, time period, or detail its earlier results are unlikely to cover
+- Keep a source when the follow-up refines, narrows, compares, or rephrases what was already researched
+- Searching is slow, so only refresh sources whose earlier results are clearly insufficient
+
+Return the list of sources to refresh; an empty list reuses everything."""
+    
+    @staticmethod
+    def followup_plan_user(previous_questions: List[str], user_question: str, analyses: Dict[str, str]) -> str:
+        """User prompt for deciding which sources a follow-up question needs."""
+        history = "\n".join(f"- {question}" for question in previous_questions)
+        available = "\n\n".join(f"{source.title()} Analysis: {analysis}" for source, analysis in analyses.items())
+        return f"""Earlier Questions:
+{history}
+
+Follow-up Question: {user_question}
+
+{available}
+
+Which of these sources ({", ".join(analyses)}) must be searched again to answer the follow-up question?"""
 
 class PromptManager:
     """Manager for creating standardized message pairs."""
@@ -166,9 +223,27 @@ class PromptManager:
             PromptTemplates.reddit_analysis_user(user_question, reddit_results, reddit_post_data),
         )
     
-    def get_synthesis_messages(self, user_question: str, google_analysis: str, bing_analysis: str, reddit_analysis: str) -> List[Dict[str, str]]:
+    def get_reddit_comment_summary_messages(self, user_question: str, comments: str) -> List[Dict[str, str]]:
+        """Get messages for summarizing a batch of Reddit comments."""
+        return self.create_message_pair(
+            PromptTemplates.reddit_comment_summary_system(),
+            PromptTemplates.reddit_comment_summary_user(user_question, comments),
+        )
+    
+    def get_synthesis_messages(
+        self, user_question: str, google_analysis: str, bing_analysis: str, reddit_analysis: str, missing_sources: List[str]
+    ) -> List[Dict[str, str]]:
         """Get messages for final synthesis."""
         return self.create_message_pair(
             PromptTemplates.synthesis_system(),
-            PromptTemplates.synthesis_user(user_question, google_analysis, bing_analysis, reddit_analysis),
-        )
\ No newline at end of file
+            PromptTemplates.synthesis_user(user_question, google_analysis, bing_analysis, reddit_analysis, missing_sources),
+        )
+    
+    def get_followup_plan_messages(
+        self, previous_questions: List[str], user_question: str, analyses: Dict[str, str]
+    ) -> List[Dict[str, str]]:
+        """Get messages for planning a follow-up turn."""
+        return self.create_message_pair(
+            PromptTemplates.followup_plan_system(),
+            PromptTemplates.followup_plan_user(previous_questions, user_question, analyses),
+        )
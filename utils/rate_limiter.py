@@ -0,0 +1,179 @@
+"""
+Process-wide rate limiting and retries for chat model calls.
+"""
+
+import asyncio
+import random
+import threading
+import time
+import weakref
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from config.settings import Settings
+from utils.metrics import LLM_QUEUE_WAIT, LLM_RATE_LIMIT_BUDGET, LLM_RATE_LIMIT_WAITING, LLM_RETRIES
+
+T = TypeVar("T")
+
+# Rate limits, overload and transient server errors are worth retrying
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+def status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of a provider error, if it carries one."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait before retrying, if it said."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for header, scale in (("retry-after-ms", 1000.0), ("retry-after", 1.0)):
+        try:
+            return max(0.0, float(headers[header]) / scale)
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+class TokenBucket:
+    """Refills to its per-minute capacity continuously; usage reported late may leave it in debt."""
+    
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60.0)
+        self.updated = now
+    
+    def delay(self, amount: float) -> float:
+        """Seconds until amount is available; requests larger than the capacity wait for a full bucket."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing * 60.0 / self.capacity)
+    
+    def consume(self, amount: float):
+        """Take amount from the bucket, or give it back when negative."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+class RateLimiter:
+    """Admits calls to one model in arrival order within its request and token budgets.
+    
+    Budgets are shared by every event loop in the process. A 429 pauses all
+    callers for the time the provider asked for, not just the one that hit it.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_retries: int,
+        retry_base_delay: float,
+        retry_max_delay: float,
+    ):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._mutex = threading.Lock()
+        self._paused_until = 0.0
+        self.waiting = 0
+        # asyncio locks belong to one loop, so each loop queues behind its own
+        self._queues: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+    
+    def _queue(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._mutex:
+            if loop not in self._queues:
+                self._queues[loop] = asyncio.Lock()
+            return self._queues[loop]
+    
+    async def acquire(self, tokens: int) -> float:
+        """Wait for one request and an estimated number of tokens; returns the seconds waited."""
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._queue():
+                while True:
+                    with self._mutex:
+                        delay = max(
+                            self._paused_until - time.monotonic(), self.requests.delay(1), self.tokens.delay(tokens)
+                        )
+                        if delay <= 0:
+                            self.requests.consume(1)
+                            self.tokens.consume(tokens)
+                            break
+                    await asyncio.sleep(delay)
+        finally:
+            self.waiting -= 1
+        
+        waited = time.monotonic() - start
+        LLM_QUEUE_WAIT.observe(waited, model=self.name)
+        return waited
+    
+    def settle(self, estimated: int, actual: Optional[int]):
+        """Correct the token budget once a call reports its real usage."""
+        if actual:
+            with self._mutex:
+                self.tokens.consume(actual - estimated)
+    
+    def pause(self, seconds: float):
+        """Hold back every caller for a while."""
+        with self._mutex:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+    
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with jitter, so callers that failed together retry apart."""
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+    
+    async def call(self, invoke: Callable[[], Awaitable[T]], tokens: int) -> T:
+        """Run a model call within the budgets, retrying rate limits and server errors."""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(tokens)
+            try:
+                return await invoke()
+            except Exception as e:
+                status = status_code(e)
+                if status not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    raise
+                requested = retry_after(e)
+                delay = requested if requested is not None else self._backoff(attempt)
+                if status == 429:
+                    self.pause(delay)
+                LLM_RETRIES.inc(model=self.name, status=str(status))
+                await asyncio.sleep(delay)
+    
+    def stats(self) -> Dict[str, float]:
+        """Return the remaining request and token budgets and the number of waiting calls."""
+        with self._mutex:
+            self.requests.consume(0)
+            self.tokens.consume(0)
+            return {"requests": self.requests.level, "tokens": self.tokens.level, "waiting": self.waiting}
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def rate_limiter(model_name: str, settings: Settings) -> RateLimiter:
+    """The process-wide limiter for a model; provider limits apply per model."""
+    with _limiters_lock:
+        if model_name not in _limiters:
+            _limiters[model_name] = RateLimiter(
+                model_name,
+                settings.llm_requests_per_minute,
+                settings.llm_tokens_per_minute,
+                settings.llm_max_retries,
+                settings.llm_retry_base_delay,
+                settings.llm_retry_max_delay,
+            )
+        return _limiters[model_name]
+
+LLM_RATE_LIMIT_BUDGET.add_collector(lambda: {
+    (name, budget): limiter.stats()[budget] for name, limiter in list(_limiters.items()) for budget in ("requests", "tokens")
+})
+LLM_RATE_LIMIT_WAITING.add_collector(lambda: {(name,): limiter.waiting for name, limiter in list(_limiters.items())})
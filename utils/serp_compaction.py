@@ -0,0 +1,88 @@
+"""
+Compaction of SERP payloads before they are sent to the LLM.
+"""
+
+from typing import Any, Dict, List, Optional, Set
+
+from utils.tokens import estimate_tokens
+from utils.urls import canonicalize_url
+
+KNOWLEDGE_FIELDS = ("name", "title", "subtitle", "description")
+MAX_KNOWLEDGE_FACTS = 10
+
+def _truncate(text: Any, max_chars: int) -> str:
+    """Cap a snippet at max_chars, cutting on a word boundary."""
+    text = " ".join(str(text or "").split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+def compact_knowledge(knowledge: Optional[Dict[str, Any]], max_chars: int) -> Dict[str, Any]:
+    """Keep only the descriptive fields and a few facts of a knowledge panel."""
+    if not knowledge:
+        return {}
+    
+    compact = {
+        field: _truncate(knowledge[field], max_chars)
+        for field in KNOWLEDGE_FIELDS if knowledge.get(field)
+    }
+    facts = [
+        {"key": fact.get("key"), "value": _truncate(fact.get("value"), max_chars)}
+        for fact in (knowledge.get("facts") or [])[:MAX_KNOWLEDGE_FACTS]
+        if isinstance(fact, dict)
+    ]
+    if facts:
+        compact["facts"] = facts
+    return compact
+
+def compact_organic(
+    organic: Optional[List[Dict[str, Any]]],
+    max_chars: int,
+    seen_urls: Set[str],
+) -> List[Dict[str, str]]:
+    """Keep title, link and a capped snippet for results whose URL is not in seen_urls."""
+    compact = []
+    kept_urls = set(seen_urls)
+    for result in organic or []:
+        link = result.get("link") or result.get("url")
+        if not link:
+            continue
+        
+        canonical = canonicalize_url(link)
+        if canonical in kept_urls:
+            continue
+        kept_urls.add(canonical)
+        
+        compact.append({
+            "title": _truncate(result.get("title"), max_chars),
+            "link": link,
+            "snippet": _truncate(result.get("description") or result.get("snippet"), max_chars),
+        })
+    return compact
+
+def fit_to_budget(results: Dict[str, Any], max_results: int, token_budget: int) -> Dict[str, Any]:
+    """Drop the lowest ranked organic results until the payload fits the token budget."""
+    organic = results["organic"][:max_results]
+    while organic and estimate_tokens(str({**results, "organic": organic})) > token_budget:
+        organic = organic[:-1]
+    return {**results, "organic": organic}
+
+def compact_engine_results(
+    results: Optional[Dict[str, Any]],
+    max_results: int,
+    max_chars: int,
+    token_budget: int,
+    seen_urls: Optional[Set[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Compact one engine's results, skipping URLs another engine already kept."""
+    if results is None:
+        return None
+    compact = {
+        "knowledge": compact_knowledge(results.get("knowledge"), max_chars),
+        "organic": compact_organic(results.get("organic"), max_chars, seen_urls or set()),
+    }
+    return fit_to_budget(compact, max_results, token_budget)
+
+def kept_urls(compacted: Optional[Dict[str, Any]]) -> Set[str]:
+    """Canonical URLs that made it into an engine's compacted results."""
+    return {canonicalize_url(result["link"]) for result in (compacted or {}).get("organic") or []}
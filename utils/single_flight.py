@@ -0,0 +1,46 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one in-flight call."""
+    
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.executed = 0
+        self.collapsed = 0
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._calls)
+    
+    def pending(self, key: str) -> Optional[asyncio.Future]:
+        """The call running under a key, if any."""
+        return self._calls.get(key)
+    
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run the call, or attach to the identical one that is already running."""
+        task = self._calls.get(key)
+        if task is None:
+            # The call runs as its own task so a disconnecting caller
+            # does not cancel it for everyone attached to it
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.executed += 1
+        else:
+            self.collapsed += 1
+        
+        return await asyncio.shield(task)
+    
+    def stats(self) -> Dict[str, int]:
+        """Return coalescing counters."""
+        return {
+            "in_flight": self.in_flight,
+            "executed": self.executed,
+            "collapsed": self.collapsed,
+        }
@@ -0,0 +1,140 @@
+"""
+Merges BrightData dataset triggers from concurrent research runs into shared snapshots.
+"""
+
+import asyncio
+import json
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Collection, Dict, List, Optional, Set, Tuple
+
+from utils.structured_logging import request_id_var
+
+# Seconds a trigger waits for others to join its snapshot; 0 disables batching
+trigger_batch_window: ContextVar[float] = ContextVar("trigger_batch_window", default=0.0)
+
+# Receives each snapshot record as it is downloaded
+RecordHandler = Callable[[Dict[str, Any]], None]
+
+@dataclass
+class DownloadSummary:
+    """What a streamed snapshot download handed over."""
+    records: int = 0
+    # Inputs whose records were cut off at the per-input limit
+    truncated: Set[Optional[str]] = field(default_factory=set)
+
+def attribute_records(
+    record_key: Callable[[Dict[str, Any]], Optional[str]], inputs: Collection[str]
+) -> Callable[[Dict[str, Any]], Optional[str]]:
+    """Key records by the input they belong to; rows that cannot be attributed go to a sole input."""
+    sole_input = next(iter(inputs)) if len(inputs) == 1 else None
+    
+    def key(record: Dict[str, Any]) -> Optional[str]:
+        record_input = record_key(record)
+        return record_input if record_input in inputs else sole_input
+    
+    return key
+
+@dataclass
+class PendingBatch:
+    """Inputs collected for one snapshot and the callers waiting on it."""
+    trigger_url: str
+    params: Dict[str, Any]
+    operation_name: str
+    record_key: Callable[[Dict[str, Any]], Optional[str]]
+    fields: Optional[Collection[str]] = None
+    inputs: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    waiters: List[Tuple[Set[str], RecordHandler, asyncio.Future]] = field(default_factory=list)
+
+class SnapshotBatcher:
+    """Collects triggers for the same dataset and routes the merged rows back."""
+    
+    def __init__(self, snapshot_ops, max_inputs: int):
+        self.snapshot_ops = snapshot_ops
+        self.max_inputs = max_inputs
+        self._batches: Dict[str, PendingBatch] = {}
+        self.snapshots_triggered = 0
+        self.inputs_merged = 0
+    
+    async def submit(
+        self,
+        trigger_url: str,
+        params: Dict[str, Any],
+        data: List[Dict[str, Any]],
+        operation_name: str,
+        input_key: Callable[[Dict[str, Any]], str],
+        record_key: Callable[[Dict[str, Any]], Optional[str]],
+        handle: RecordHandler,
+        window: float,
+        fields: Optional[Collection[str]] = None,
+    ) -> Optional[DownloadSummary]:
+        """Add inputs to the open batch for this dataset; their rows are handed to handle as they arrive."""
+        loop = asyncio.get_running_loop()
+        batch_id = json.dumps([trigger_url, params], sort_keys=True)
+        
+        batch = self._batches.get(batch_id)
+        if batch is None:
+            batch = PendingBatch(trigger_url, params, operation_name, record_key, fields)
+            self._batches[batch_id] = batch
+            loop.call_later(window, self._flush, batch_id, batch)
+        
+        keys = set()
+        for item in data:
+            key = input_key(item)
+            batch.inputs.setdefault(key, item)
+            keys.add(key)
+        
+        future = loop.create_future()
+        batch.waiters.append((keys, handle, future))
+        
+        if len(batch.inputs) >= self.max_inputs:
+            self._flush(batch_id, batch)
+        
+        return await future
+    
+    def _flush(self, batch_id: str, batch: PendingBatch):
+        """Close a batch to new inputs and trigger its snapshot."""
+        if self._batches.get(batch_id) is not batch:
+            return
+        del self._batches[batch_id]
+        asyncio.get_running_loop().create_task(self._run(batch))
+    
+    async def _run(self, batch: PendingBatch):
+        """Trigger one snapshot for the whole batch and hand each caller its rows."""
+        request_id_var.set(None)
+        self.snapshots_triggered += 1
+        self.inputs_merged += len(batch.inputs)
+        
+        # Each row goes straight to the callers that asked for its input
+        key = attribute_records(batch.record_key, batch.inputs)
+        routes: Dict[str, List[int]] = {}
+        for index, (keys, _, _) in enumerate(batch.waiters):
+            for input_key in keys:
+                routes.setdefault(input_key, []).append(index)
+        delivered = [0] * len(batch.waiters)
+        
+        def route(record: Dict[str, Any]):
+            for index in routes.get(key(record), []):
+                batch.waiters[index][1](record)
+                delivered[index] += 1
+        
+        try:
+            summary = await self.snapshot_ops.trigger_and_download_snapshot(
+                batch.trigger_url,
+                batch.params,
+                list(batch.inputs.values()),
+                f"{batch.operation_name} (batch of {len(batch.inputs)})",
+                route,
+                batch.fields,
+                key,
+            )
+        except Exception as e:
+            if self.snapshot_ops.logger:
+                self.snapshot_ops.logger.error(f"Batched {batch.operation_name} failed: {e}")
+            summary = None
+        
+        for index, (keys, _, future) in enumerate(batch.waiters):
+            if not future.done():
+                future.set_result(
+                    None if summary is None else DownloadSummary(delivered[index], summary.truncated & keys)
+                )
@@ -2,102 +2,148 @@
 Snapshot operations utilities for BrightData API.
 """
 
-import time
-import requests
-from typing import List, Dict, Any, Optional
+import json
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, Collection, List, Dict, Any, Optional
 
 from services.base_service import BaseService
+from utils.http_client import BrightDataClient
+from utils.snapshot_batcher import (
+    DownloadSummary, RecordHandler, SnapshotBatcher, attribute_records, trigger_batch_window
+)
+from utils.snapshot_poller import SnapshotPoller
+from utils.structured_logging import ResearchLogger
+
+def project_record(record: Dict[str, Any], fields: Optional[Collection[str]]) -> Dict[str, Any]:
+    """Keep only the given fields of a snapshot record."""
+    if fields is None:
+        return record
+    return {key: record[key] for key in fields if key in record}
 
 class SnapshotOperations(BaseService):
     """Operations for managing BrightData snapshots."""
     
-    def poll_snapshot_status(self, snapshot_id: str) -> bool:
-        """Poll snapshot status until completion or timeout."""
-        progress_url = f"https://api.brightdata.com/datasets/v3/progress/{snapshot_id}"
-        headers = {"Authorization": f"Bearer {self.settings.brightdata_api_key}"}
-        
-        for attempt in range(self.settings.max_poll_attempts):
-            try:
-                print(f"⏳ Checking snapshot progress... (attempt {attempt + 1}/{self.settings.max_poll_attempts})")
-                
-                response = requests.get(progress_url, headers=headers)
-                response.raise_for_status()
-                
-                progress_data = response.json()
-                status = progress_data.get("status")
-                
-                if status == "ready":
-                    print("✅ Snapshot completed!")
-                    return True
-                elif status == "failed":
-                    print("❌ Snapshot failed")
-                    return False
-                elif status == "canceled":
-                    print("❌ Snapshot cancelled")
-                    return False
-                elif status == "running":
-                    print("🔄 Still processing...")
-                    time.sleep(self.settings.poll_delay)
-                else:
-                    print(f"❓ Unknown status: {status}")
-                    time.sleep(self.settings.poll_delay)
-            
-            except Exception as e:
-                print(f"❓ Error checking status: {e}")
-                time.sleep(self.settings.poll_delay)
+    def __init__(self, settings, client: Optional[BrightDataClient] = None, logger: Optional[ResearchLogger] = None):
+        super().__init__(settings)
+        self.client = client or BrightDataClient(settings)
+        self.logger = logger
+        self.poller = SnapshotPoller(settings, self.client, logger)
+        self.batcher = SnapshotBatcher(self, settings.batch_max_inputs)
+    
+    async def poll_snapshot_status(self, snapshot_id: str) -> bool:
+        """Wait for the shared poller to report snapshot completion."""
+        return await self.poller.wait(snapshot_id)
+    
+    async def stream_snapshot(self, snapshot_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield snapshot records one NDJSON line at a time."""
+        download_url = self.client.url(f"/datasets/v3/snapshot/{snapshot_id}")
         
-        print("⏰ Timeout waiting for snapshot completion")
-        return False
+        async with aclosing(self.client.stream_lines("GET", download_url, params={"format": "ndjson"})) as lines:
+            async for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    if self.logger:
+                        self.logger.warning("Skipping malformed snapshot record", snapshot_id=snapshot_id)
     
-    def download_snapshot(self, snapshot_id: str, format: str = "json") -> Optional[List[Dict[str, Any]]]:
-        """Download snapshot data."""
-        download_url = f"https://api.brightdata.com/datasets/v3/snapshot/{snapshot_id}?format={format}"
-        headers = {"Authorization": f"Bearer {self.settings.brightdata_api_key}"}
+    async def download_snapshot(
+        self,
+        snapshot_id: str,
+        handle: RecordHandler,
+        fields: Optional[Collection[str]] = None,
+        record_key: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[DownloadSummary]:
+        """Hand each snapshot record to handle as it arrives, keeping only the given fields.
         
+        At most limit non-error records are kept per input, as told apart by
+        record_key, so one large input cannot crowd out the others. Nothing is
+        accumulated here; returns None if the download failed.
+        """
+        limit = limit or self.settings.snapshot_max_records
+        summary = DownloadSummary()
+        kept: Dict[Optional[str], int] = {}
         try:
-            print("📥 Downloading snapshot data...")
-            
-            response = requests.get(download_url, headers=headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            print(f"🎉 Successfully downloaded {len(data) if isinstance(data, list) else 1} items")
-            
-            return data
+            async with aclosing(self.stream_snapshot(snapshot_id)) as records:
+                async for record in records:
+                    if not record.get("error"):
+                        key = record_key(record) if record_key else None
+                        if kept.get(key, 0) >= limit:
+                            summary.truncated.add(key)
+                            # Without inputs to tell apart, the rest of the snapshot is not needed
+                            if record_key is None:
+                                break
+                            continue
+                        kept[key] = kept.get(key, 0) + 1
+                    handle(project_record(record, fields))
+                    summary.records += 1
         except Exception as e:
-            print(f"❌ Error downloading snapshot: {e}")
+            if self.logger:
+                self.logger.error(f"Error downloading snapshot: {e}", snapshot_id=snapshot_id)
             return None
+        
+        if self.logger:
+            self.logger.debug(f"Downloaded {summary.records} snapshot records", snapshot_id=snapshot_id)
+            if summary.truncated:
+                self.logger.warning(
+                    f"Kept only the first {limit} records of {len(summary.truncated)} snapshot inputs",
+                    snapshot_id=snapshot_id,
+                )
+        return summary
     
-    def trigger_and_download_snapshot(
+    async def trigger_and_download_snapshot(
         self, 
         trigger_url: str, 
         params: Dict[str, Any], 
         data: List[Dict[str, Any]], 
-        operation_name: str = "operation"
-    ) -> Optional[List[Dict[str, Any]]]:
-        """Trigger snapshot creation and download results."""
+        operation_name: str,
+        handle: RecordHandler,
+        fields: Optional[Collection[str]] = None,
+        record_key: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None,
+    ) -> Optional[DownloadSummary]:
+        """Trigger snapshot creation and stream its records to handle."""
         # Make API request
-        headers = {
-            "Authorization": f"Bearer {self.settings.brightdata_api_key}",
-            "Content-Type": "application/json",
-        }
-        
         try:
-            response = requests.post(trigger_url, headers=headers, params=params, json=data)
-            response.raise_for_status()
-            trigger_result = response.json()
+            trigger_result = await self.client.post_json(trigger_url, params=params, json=data)
         except Exception as e:
-            print(f"Failed to trigger {operation_name}: {e}")
+            if self.logger:
+                self.logger.error(f"Failed to trigger {operation_name}: {e}")
             return None
         
         snapshot_id = trigger_result.get("snapshot_id")
         if not snapshot_id:
-            print(f"No snapshot ID received for {operation_name}")
+            if self.logger:
+                self.logger.error(f"No snapshot ID received for {operation_name}")
             return None
         
         # Poll for completion
-        if not self.poll_snapshot_status(snapshot_id):
+        if not await self.poll_snapshot_status(snapshot_id):
             return None
         
         # Download results
-        return self.download_snapshot(snapshot_id)
\ No newline at end of file
+        return await self.download_snapshot(snapshot_id, handle, fields, record_key)
+    
+    async def trigger_batched_snapshot(
+        self,
+        trigger_url: str,
+        params: Dict[str, Any],
+        data: List[Dict[str, Any]],
+        operation_name: str,
+        input_key: Callable[[Dict[str, Any]], str],
+        record_key: Callable[[Dict[str, Any]], Optional[str]],
+        handle: RecordHandler,
+        fields: Optional[Collection[str]] = None,
+    ) -> Optional[DownloadSummary]:
+        """Trigger a snapshot, sharing it with concurrent runs when batching is enabled."""
+        window = trigger_batch_window.get()
+        if window <= 0:
+            inputs = {input_key(item) for item in data}
+            return await self.trigger_and_download_snapshot(
+                trigger_url, params, data, operation_name, handle, fields, attribute_records(record_key, inputs)
+            )
+        
+        return await self.batcher.submit(
+            trigger_url, params, data, operation_name, input_key, record_key, handle, window, fields
+        )
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Shared background poller for BrightData snapshot progress.
+"""
+
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+from config.settings import Settings
+from utils.http_client import BrightDataClient
+from utils.metrics import SNAPSHOT_POLLS, SNAPSHOT_POLL_ATTEMPTS
+from utils.structured_logging import ResearchLogger, request_id_var
+
+@dataclass
+class PendingSnapshot:
+    """Polling state for one outstanding snapshot."""
+    future: asyncio.Future
+    started_at: float
+    next_poll_at: float
+    delay: float
+    attempts: int = 0
+    polling: bool = False
+
+class SnapshotPoller:
+    """Schedules polls of every outstanding snapshot from a single background task.
+    
+    Each poll runs as its own task, so a slow progress request only delays
+    the snapshot it is checking.
+    """
+    
+    def __init__(self, settings: Settings, client: BrightDataClient, logger: Optional[ResearchLogger] = None):
+        self.settings = settings
+        self.client = client
+        self.logger = logger
+        self._pending: Dict[str, PendingSnapshot] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._polls: Set[asyncio.Task] = set()
+    
+    @property
+    def outstanding(self) -> int:
+        """Number of snapshots currently being tracked."""
+        return len(self._pending)
+    
+    async def wait(self, snapshot_id: str) -> bool:
+        """Wait until a snapshot is ready. Returns False if it failed or timed out."""
+        loop = asyncio.get_running_loop()
+        self._ensure_running(loop)
+        
+        entry = self._pending.get(snapshot_id)
+        if entry is None or entry.future.done():
+            now = loop.time()
+            delay = self.settings.poll_initial_delay
+            entry = PendingSnapshot(
+                future=loop.create_future(),
+                started_at=now,
+                next_poll_at=now + self._jittered(delay),
+                delay=delay,
+            )
+            # Cancelling a waiter cancels its future, which drops the snapshot
+            entry.future.add_done_callback(lambda _: self._wakeup.set())
+            self._pending[snapshot_id] = entry
+            self._wakeup.set()
+        
+        return await entry.future
+    
+    def _ensure_running(self, loop: asyncio.AbstractEventLoop):
+        """Start the background task on the running loop if needed."""
+        if self._loop is not loop:
+            self._pending = {}
+            self._wakeup = asyncio.Event()
+            self._task = None
+            self._loop = loop
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+    
+    def _jittered(self, delay: float) -> float:
+        """Spread polls out so snapshots triggered together don't poll together."""
+        jitter = self.settings.poll_jitter
+        return delay * random.uniform(1 - jitter, 1 + jitter)
+    
+    async def _run(self):
+        """Start polls of due snapshots, then sleep until the next one is due."""
+        # Shared by every request, so it must not carry the first caller's ID
+        request_id_var.set(None)
+        while True:
+            for snapshot_id in [s for s, e in self._pending.items() if e.future.done()]:
+                del self._pending[snapshot_id]
+            
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            
+            now = self._loop.time()
+            idle = {s: e for s, e in self._pending.items() if not e.polling}
+            due = [s for s, e in idle.items() if e.next_poll_at <= now]
+            for snapshot_id in due:
+                entry = idle[snapshot_id]
+                entry.polling = True
+                task = self._loop.create_task(self._poll(snapshot_id, entry))
+                self._polls.add(task)
+                task.add_done_callback(self._polls.discard)
+            if due:
+                continue
+            
+            # Finished polls wake the loop to schedule their snapshot's next one
+            next_poll_at = min((e.next_poll_at for e in idle.values()), default=None)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=None if next_poll_at is None else next_poll_at - now)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _poll(self, snapshot_id: str, entry: PendingSnapshot):
+        """Check one snapshot and either resolve it or schedule its next poll."""
+        try:
+            await self._check(snapshot_id, entry)
+        finally:
+            entry.polling = False
+            self._wakeup.set()
+    
+    async def _check(self, snapshot_id: str, entry: PendingSnapshot):
+        """Request a snapshot's progress and act on its status."""
+        entry.attempts += 1
+        progress_url = self.client.url(f"/datasets/v3/progress/{snapshot_id}")
+        
+        try:
+            progress_data = await self.client.get_json(progress_url)
+            status = progress_data.get("status")
+        except Exception as e:
+            if self.logger:
+                self.logger.warning(f"Error checking snapshot status: {e}", snapshot_id=snapshot_id)
+            status = None
+        
+        SNAPSHOT_POLLS.inc(status=status or "error")
+        if entry.future.done():
+            return
+        
+        if status == "ready":
+            if self.logger:
+                self.logger.info(f"Snapshot ready after {entry.attempts} polls", snapshot_id=snapshot_id)
+            SNAPSHOT_POLL_ATTEMPTS.observe(entry.attempts, outcome="ready")
+            entry.future.set_result(True)
+        elif status in ("failed", "canceled"):
+            if self.logger:
+                self.logger.error(f"Snapshot {status}", snapshot_id=snapshot_id)
+            SNAPSHOT_POLL_ATTEMPTS.observe(entry.attempts, outcome=status)
+            entry.future.set_result(False)
+        elif self._loop.time() - entry.started_at >= self.settings.poll_timeout:
+            if self.logger:
+                self.logger.error(f"Timed out after {entry.attempts} polls", snapshot_id=snapshot_id)
+            SNAPSHOT_POLL_ATTEMPTS.observe(entry.attempts, outcome="timeout")
+            entry.future.set_result(False)
+        else:
+            entry.delay = min(entry.delay * self.settings.poll_backoff_factor, self.settings.poll_max_delay)
+            entry.next_poll_at = self._loop.time() + self._jittered(entry.delay)
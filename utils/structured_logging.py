@@ -0,0 +1,142 @@
+"""
+Structured, non-blocking logging shared by the services, the API and the UIs.
+"""
+
+import atexit
+import itertools
+import logging
+import queue
+import sys
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueListener
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+LogEntry = Dict[str, Any]
+
+# Set per research run; every record logged inside the run carries it
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+def new_request_id() -> str:
+    """Generate a short unique request ID."""
+    return uuid.uuid4().hex[:12]
+
+@contextmanager
+def request_context(request_id: Optional[str] = None) -> Iterator[str]:
+    """Tag every record logged inside the block with a request ID."""
+    request_id = request_id or new_request_id()
+    token = request_id_var.set(request_id)
+    try:
+        yield request_id
+    finally:
+        request_id_var.reset(token)
+
+class ConsoleFormatter(logging.Formatter):
+    """One-line console format with the request ID when there is one."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        tag = f"[{record.request_id}] " if record.request_id else ""
+        return f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7} {tag}{record.getMessage()}"
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent records as dicts and passes each one to subscribers."""
+    
+    def __init__(self, capacity: int):
+        super().__init__()
+        self.entries: deque = deque(maxlen=capacity)
+        self.subscribers: Dict[int, Callable[[LogEntry], None]] = {}
+    
+    def emit(self, record: logging.LogRecord):
+        entry = {
+            "timestamp": record.created,
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "request_id": record.request_id,
+            **record.fields,
+        }
+        self.entries.append(entry)
+        for callback in list(self.subscribers.values()):
+            try:
+                callback(entry)
+            except Exception:
+                self.handleError(record)
+
+class ResearchLogger:
+    """Structured logger that hands records to a background thread.
+    
+    Logging a message only builds a record and puts it on a queue; buffering,
+    console output and subscriber callbacks all run on the listener thread.
+    Subscribers are therefore called from that thread and must hand entries
+    over to their own thread or event loop themselves.
+    """
+    
+    def __init__(self, name: str = "epistemo", level: str = "INFO", capacity: int = 1000, console: bool = True):
+        self.name = name
+        self.level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._buffer = RingBufferHandler(capacity)
+        self._subscriber_ids = itertools.count()
+        
+        handlers: List[logging.Handler] = [self._buffer]
+        if console:
+            console_handler = logging.StreamHandler(sys.stderr)
+            console_handler.setFormatter(ConsoleFormatter())
+            handlers.append(console_handler)
+        
+        self._listener: Optional[QueueListener] = QueueListener(self._queue, *handlers)
+        self._listener.start()
+        atexit.register(self.close)
+    
+    def log(self, level: int, message: str, **fields: Any):
+        """Queue a record if the level is enabled."""
+        if level < self.level or self._listener is None:
+            return
+        record = logging.LogRecord(self.name, level, "", 0, message, None, None)
+        record.request_id = request_id_var.get()
+        record.fields = fields
+        self._queue.put_nowait(record)
+    
+    def debug(self, message: str, **fields: Any):
+        """Log a debug message."""
+        self.log(logging.DEBUG, message, **fields)
+    
+    def info(self, message: str, **fields: Any):
+        """Log an info message."""
+        self.log(logging.INFO, message, **fields)
+    
+    def success(self, message: str, **fields: Any):
+        """Log a success message."""
+        self.log(SUCCESS, message, **fields)
+    
+    def warning(self, message: str, **fields: Any):
+        """Log a warning message."""
+        self.log(logging.WARNING, message, **fields)
+    
+    def error(self, message: str, **fields: Any):
+        """Log an error message."""
+        self.log(logging.ERROR, message, **fields)
+    
+    def subscribe(self, callback: Callable[[LogEntry], None]) -> Callable[[], None]:
+        """Call back with every new entry; returns a function that unsubscribes."""
+        subscriber_id = next(self._subscriber_ids)
+        self._buffer.subscribers[subscriber_id] = callback
+        return lambda: self._buffer.subscribers.pop(subscriber_id, None)
+    
+    def entries(self, request_id: Optional[str] = None, limit: Optional[int] = None) -> List[LogEntry]:
+        """Return buffered entries, oldest first, optionally for one request."""
+        entries = [
+            entry for entry in list(self._buffer.entries)
+            if request_id is None or entry["request_id"] == request_id
+        ]
+        return entries[-limit:] if limit else entries
+    
+    def close(self):
+        """Flush queued records and stop the listener thread."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
@@ -0,0 +1,12 @@
+"""
+Cheap token estimation for prompt budgeting.
+"""
+
+import math
+
+# OpenAI tokenizers average roughly four characters of English per token
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
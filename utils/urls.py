@@ -0,0 +1,36 @@
+"""
+URL canonicalization helpers.
+"""
+
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+REDDIT_POST_PATH = re.compile(r"^/r/([^/]+)/comments/([^/]+)", re.IGNORECASE)
+
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|gclid|fbclid|msclkid|ref|ref_src)$", re.IGNORECASE)
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a web URL so the same page from different engines compares equal."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[len("www."):]
+    
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query) if not TRACKING_PARAMS.match(key)
+    ))
+    path = parts.path.rstrip("/") or "/"
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+def canonicalize_reddit_url(url: str) -> str:
+    """Reduce any form of a Reddit post URL to https://www.reddit.com/r/<sub>/comments/<id>/."""
+    parts = urlsplit(url.strip())
+    match = REDDIT_POST_PATH.match(parts.path)
+    if match:
+        subreddit, post_id = match.groups()
+        return f"https://www.reddit.com/r/{subreddit.lower()}/comments/{post_id.lower()}/"
+    
+    host = parts.netloc.lower()
+    if host.endswith("reddit.com"):
+        host = "www.reddit.com"
+    return f"https://{host}{parts.path.rstrip('/')}/"